@@ -0,0 +1,296 @@
+#!/usr/bin/python3
+"""
+Benchmarks for the field and weather data pipelines on synthetic data.
+
+Example:
+    python benchmark_pipeline.py --sizes 10000 100000 --output results.json \
+        --baseline baseline.json
+"""
+import argparse
+import json
+import os
+import platform
+import sqlite3
+import tempfile
+import numpy as np
+import pandas as pd
+from data_ingestion import get_db_engine, query_data
+from field_data_processor import FieldDataProcessor
+from instrumentation import PipelineMetrics
+from weather_data_processor import WeatherDataProcessor
+
+SQL_QUERY = """
+SELECT *
+FROM geographic_features
+LEFT JOIN weather_features USING (Field_ID)
+LEFT JOIN soil_and_crop_features USING (Field_ID)
+LEFT JOIN farm_management_features USING (Field_ID)
+"""
+
+REGEX_PATTERNS = {
+    'Rainfall': r'(\d+(\.\d+)?)\s?mm',
+    'Temperature': r'(\d+(\.\d+)?)\s?C',
+    'Pollution_level': r'=\s*(-?\d+(\.\d+)?)|Pollution at \s*(-?\d+(\.\d+)?)'
+}
+
+# Message templates in the formats the regex patterns above expect.
+MESSAGE_TEMPLATES = [
+    ('Rainfall', '[{ts}] Rainfall recorded: {value} mm'),
+    ('Rainfall', '{ts} 降雨量 {value}mm'),
+    ('Temperature', '【{ts}】温度感应: 现在温度是 {value}C.'),
+    ('Temperature', '{ts} Temperature reading: {value} C'),
+    ('Pollution_level', '{ts} Pollution at {value}'),
+    ('Pollution_level', '{ts} Air quality index = {value}'),
+]
+
+# Crop names including the misspellings and stray spaces apply_corrections fixes.
+CROP_TYPES = ['cassava', 'cassaval', 'tea', 'teaa', 'wheat', 'wheatn',
+              'potato', 'banana', 'coffee', 'rice', 'maize', 'cassava ']
+LOCATIONS = ['Rural_Akatsi', 'Rural_Sokoto', 'Rural_Hawassa', 'Rural_Kilimani',
+             'Rural_Amanzi']
+SOIL_TYPES = ['Sandy', 'Loamy', 'Clay', 'Silt', 'Rocky', 'Peaty', 'Volcanic']
+
+
+def generate_survey_db(path, n_rows, seed=0, chunk_rows=1000000):
+    """
+    Writes a SQLite database shaped like Maji_Ndogo_farm_survey_small.db.
+
+    The four feature tables share shuffled Field_IDs, and the
+    farm_management_features table keeps the swapped Crop_type/Annual_yield
+    columns of the original survey.
+
+    Parameters:
+    path (str): Destination database file; an existing file is replaced.
+    n_rows (int): Number of fields.
+    seed (int): Random seed. Defaults to 0.
+    chunk_rows (int): Rows generated and written at a time. Defaults to 10^6.
+    """
+    if os.path.exists(path):
+        os.remove(path)
+    rng = np.random.default_rng(seed)
+    field_ids = rng.permutation(n_rows) + 1
+    with sqlite3.connect(path) as conn:
+        for start in range(0, n_rows, chunk_rows):
+            ids = field_ids[start:start + chunk_rows]
+            n = len(ids)
+            tables = {
+                'geographic_features': pd.DataFrame({
+                    'Field_ID': ids,
+                    # A few negative elevations for apply_corrections to fix.
+                    'Elevation': rng.uniform(35, 1200, n) * rng.choice([1, -1], n, p=[0.97, 0.03]),
+                    'Latitude': rng.uniform(-11.5, -4, n),
+                    'Longitude': rng.uniform(-10, 0, n),
+                    'Location': rng.choice(LOCATIONS, n),
+                    'Slope': rng.uniform(0, 30, n)}),
+                'weather_features': pd.DataFrame({
+                    'Field_ID': ids,
+                    'Rainfall': rng.uniform(100, 3500, n),
+                    'Min_temperature_C': rng.uniform(-10, 5, n),
+                    'Max_temperature_C': rng.uniform(20, 35, n),
+                    'Ave_temps': rng.uniform(5, 30, n)}),
+                'soil_and_crop_features': pd.DataFrame({
+                    'Field_ID': ids,
+                    'Soil_fertility': rng.uniform(0.4, 0.9, n),
+                    'Soil_type': rng.choice(SOIL_TYPES, n),
+                    'pH': rng.uniform(4, 8, n)}),
+                'farm_management_features': pd.DataFrame({
+                    'Field_ID': ids,
+                    'Pollution_level': rng.uniform(0, 1, n),
+                    'Plot_size': rng.uniform(0.5, 15, n).round(1),
+                    'Crop_type': rng.uniform(0, 3, n),
+                    'Annual_yield': rng.choice(CROP_TYPES, n),
+                    'Standard_yield': rng.uniform(0, 1, n)}),
+            }
+            for table, df in tables.items():
+                df.to_sql(table, conn, if_exists='append', index=False)
+
+
+def generate_mapping_csv(path, n_rows, n_stations=5, seed=0):
+    """
+    Writes a Field_ID to Weather_station mapping CSV, with the stray unnamed
+    index column of Weather_data_field_mapping.csv.
+    """
+    rng = np.random.default_rng(seed)
+    pd.DataFrame({'Field_ID': np.arange(1, n_rows + 1),
+                  'Weather_station': rng.integers(0, n_stations, n_rows)}).to_csv(path)
+
+
+def generate_weather_csv(path, n_rows, n_stations=5, seed=0, chunk_rows=1000000):
+    """
+    Writes a weather station message log with Weather_station_ID and Message
+    columns, using the Rainfall/Temperature/Pollution message formats.
+    """
+    rng = np.random.default_rng(seed)
+    header = True
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        for start in range(0, n_rows, chunk_rows):
+            n = min(chunk_rows, n_rows - start)
+            templates = rng.integers(0, len(MESSAGE_TEMPLATES), n)
+            values = rng.uniform(0, 100, n).round(2)
+            seconds = rng.integers(1640995200, 1672531200, n)
+            timestamps = pd.to_datetime(seconds, unit='s').strftime('%Y-%m-%d %H:%M:%S')
+            messages = [MESSAGE_TEMPLATES[t][1].format(ts=ts, value=v)
+                        for t, ts, v in zip(templates, timestamps, values)]
+            pd.DataFrame({'Weather_station_ID': rng.integers(0, n_stations, n),
+                          'Message': messages}).to_csv(f, index=False, header=header)
+            header = False
+
+
+def benchmark_size(workdir, n_rows, trace_memory=False, seed=0):
+    """
+    Generates data for one size and times each pipeline operation.
+
+    Returns:
+    list: One record per operation with wall/CPU time, rows, rows per second
+    and memory, as produced by PipelineMetrics.
+    """
+    db_path = os.path.join(workdir, f'survey_{n_rows}.db')
+    mapping_path = os.path.join(workdir, f'mapping_{n_rows}.csv')
+    weather_path = os.path.join(workdir, f'weather_{n_rows}.csv')
+    generate_survey_db(db_path, n_rows, seed)
+    generate_mapping_csv(mapping_path, n_rows, seed=seed)
+    generate_weather_csv(weather_path, n_rows, seed=seed)
+
+    config_params = {
+        'sql_query': SQL_QUERY,
+        'db_path': 'sqlite:///' + db_path,
+        'columns_to_rename': {'Annual_yield': 'Crop_type', 'Crop_type': 'Annual_yield'},
+        'values_to_rename': {'cassaval': 'cassava', 'wheatn': 'wheat', 'teaa': 'tea'},
+        'weather_csv_path': weather_path,
+        'weather_mapping_csv': mapping_path,
+        'regex_patterns': REGEX_PATTERNS,
+    }
+    metrics = PipelineMetrics('benchmark', trace_memory)
+
+    engine = get_db_engine(config_params['db_path'])
+    with metrics.stage('query_data') as stage:
+        df = query_data(engine, SQL_QUERY)
+        stage.rows_out = len(df)
+
+    field_processor = FieldDataProcessor(config_params, "NONE")
+    field_processor.df = df
+    field_processor.rename_columns()
+    with metrics.stage('apply_corrections', len(df)) as stage:
+        field_processor.apply_corrections()
+        stage.rows_out = len(field_processor.df)
+    with metrics.stage('weather_station_mapping', len(df)) as stage:
+        field_processor.weather_station_mapping()
+        stage.rows_out = len(field_processor.df)
+
+    weather_processor = WeatherDataProcessor(config_params, "NONE")
+    weather_processor.weather_station_mapping()
+    n_messages = len(weather_processor.weather_df)
+    with metrics.stage('process_messages', n_messages) as stage:
+        weather_processor.process_messages()
+        stage.rows_out = n_messages
+    with metrics.stage('calculate_means', n_messages) as stage:
+        means = weather_processor.calculate_means()
+        stage.rows_out = len(means)
+
+    records = []
+    for record in metrics.as_records():
+        rows = record['rows_in'] if record['rows_in'] is not None else record['rows_out']
+        records.append({
+            'operation': record['stage'], 'size': n_rows, 'rows': rows,
+            'wall_seconds': record['wall_seconds'],
+            'cpu_seconds': record['cpu_seconds'],
+            'rows_per_second': rows / record['wall_seconds'] if record['wall_seconds'] else None,
+            'peak_traced_bytes': record['peak_traced_bytes'],
+            'rss_delta_bytes': record['rss_delta_bytes'],
+        })
+    return records
+
+
+def compare_to_baseline(results, baseline, tolerance=0.1):
+    """
+    Compares benchmark results with a baseline run.
+
+    Parameters:
+    results (list): Records from this run.
+    baseline (list): Records from the baseline run.
+    tolerance (float): Allowed relative slowdown before an operation is
+    flagged as a regression. Defaults to 0.1 (10%).
+
+    Returns:
+    list: For each operation and size present in both runs, the wall times,
+    their ratio and whether it is a regression.
+    """
+    baseline_times = {(r['operation'], r['size']): r['wall_seconds'] for r in baseline}
+    comparison = []
+    for record in results:
+        key = (record['operation'], record['size'])
+        if key not in baseline_times:
+            continue
+        ratio = record['wall_seconds'] / baseline_times[key]
+        comparison.append({'operation': key[0], 'size': key[1],
+                           'baseline_seconds': baseline_times[key],
+                           'wall_seconds': record['wall_seconds'],
+                           'ratio': ratio, 'regression': ratio > 1 + tolerance})
+    return comparison
+
+
+def run_benchmarks(sizes, output_path, baseline_path=None, workdir=None,
+                   trace_memory=False, tolerance=0.1, seed=0):
+    """
+    Runs the pipeline benchmarks for each size and writes the results.
+
+    Parameters:
+    sizes (list): Numbers of rows to generate, e.g. [10**4, 10**5].
+    output_path (str): JSON file the results are written to.
+    baseline_path (str): Optional JSON results file of an earlier run to
+    compare against.
+    workdir (str): Directory for the generated data. Defaults to a
+    temporary directory that is removed afterwards.
+    trace_memory (bool): Record tracemalloc peaks, which slows the runs.
+    tolerance (float): Allowed relative slowdown against the baseline.
+    seed (int): Random seed for the generated data.
+
+    Returns:
+    dict: The results written to output_path.
+    """
+    with tempfile.TemporaryDirectory() as tmpdir:
+        workdir = workdir or tmpdir
+        results = []
+        for n_rows in sizes:
+            results.extend(benchmark_size(workdir, n_rows, trace_memory, seed))
+    report = {'python': platform.python_version(), 'pandas': pd.__version__,
+              'numpy': np.__version__, 'machine': platform.machine(),
+              'results': results}
+    if baseline_path:
+        with open(baseline_path) as f:
+            report['comparison'] = compare_to_baseline(results, json.load(f)['results'],
+                                                       tolerance)
+    with open(output_path, 'w') as f:
+        json.dump(report, f, indent=2)
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000],
+                        help='Numbers of rows to benchmark.')
+    parser.add_argument('--output', default='benchmark_results.json',
+                        help='File the results are written to.')
+    parser.add_argument('--baseline', help='Results file of a previous run to compare against.')
+    parser.add_argument('--workdir', help='Keep the generated data in this directory.')
+    parser.add_argument('--trace-memory', action='store_true',
+                        help='Record tracemalloc peaks (slower).')
+    parser.add_argument('--tolerance', type=float, default=0.1,
+                        help='Allowed relative slowdown against the baseline.')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    report = run_benchmarks(args.sizes, args.output, args.baseline, args.workdir,
+                            args.trace_memory, args.tolerance, args.seed)
+    for record in report['results']:
+        print(f"{record['operation']:<25} {record['size']:>10} rows "
+              f"{record['wall_seconds']:>10.4f}s {record['rows_per_second']:>14.0f} rows/s")
+    regressions = [c for c in report.get('comparison', []) if c['regression']]
+    for c in regressions:
+        print(f"REGRESSION {c['operation']} at {c['size']} rows: "
+              f"{c['ratio']:.2f}x the baseline time")
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,49 @@
+import functools
+import threading
+import time
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+
+
+class _CountingHandler(SimpleHTTPRequestHandler):
+    """
+    Serves files from a directory, counting requests and response codes.
+    Paths starting with /slow/ are answered after `delay` seconds.
+    """
+
+    def __init__(self, *args, server_state, **kwargs):
+        self.server_state = server_state
+        super().__init__(*args, **kwargs)
+
+    def do_GET(self):
+        self.server_state['requests'].append(self.path)
+        if self.path.startswith('/slow/'):
+            time.sleep(self.server_state['delay'])
+            self.path = self.path[len('/slow'):]
+        super().do_GET()
+
+    def send_response(self, code, message=None):
+        self.server_state['codes'].append(code)
+        super().send_response(code, message)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def http_server(tmp_path):
+    """
+    A local http.server standing in for the CSV host. Yields a dict with the
+    served directory, the base URL and the recorded requests and codes.
+    """
+    state = {'dir': tmp_path, 'requests': [], 'codes': [], 'delay': 1.0}
+    handler = functools.partial(_CountingHandler, directory=str(tmp_path),
+                                server_state=state)
+    server = ThreadingHTTPServer(('127.0.0.1', 0), handler)
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    state['url'] = f'http://127.0.0.1:{server.server_port}'
+    yield state
+    server.shutdown()
+    server.server_close()
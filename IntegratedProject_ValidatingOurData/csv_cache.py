@@ -0,0 +1,299 @@
+#!/usr/bin/python3
+import hashlib
+import io
+import json
+import logging
+import os
+import pickle
+import tempfile
+import time
+import urllib.error
+import urllib.request
+from contextlib import contextmanager
+import pandas as pd
+try:
+    import fcntl
+except ImportError:  # Not available on Windows; the index is then updated without a lock.
+    fcntl = None
+# Name logger for module-specific logs in csv_cache module.
+logger = logging.getLogger('csv_cache')
+
+
+class CSVCache:
+
+    DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+    def __init__(self, cache_dir, max_bytes=DEFAULT_MAX_BYTES, timeout=30):
+        """
+        Initialize an on-disk cache of parsed CSV files.
+
+        Parsed DataFrames are pickled into `cache_dir`, keyed by URL. HTTP(S)
+        entries are revalidated with a conditional GET (ETag/Last-Modified),
+        local files by their modification time and size. When the cache
+        grows past `max_bytes` the least recently used entries are evicted.
+        Several instances, also in other processes, may share `cache_dir`:
+        every index update re-reads the index under a file lock.
+
+        Parameters:
+        - cache_dir (str): Directory holding the cache files and index.
+        - max_bytes (int): Upper bound on the total size of cached entries.
+        Defaults to 256 MiB.
+        - timeout (float): Timeout in seconds for HTTP requests. Defaults to 30.
+        """
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.timeout = timeout
+        self.index_path = os.path.join(cache_dir, 'index.json')
+        self.lock_path = os.path.join(cache_dir, 'index.lock')
+        os.makedirs(cache_dir, exist_ok=True)
+        self.index = self._load_index()
+
+    @contextmanager
+    def _locked_index(self):
+        """
+        Holds the index lock, reloads the index from disk so changes made
+        by other instances are kept, and writes it back on exit.
+        """
+        with open(self.lock_path, 'a') as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                self.index = self._load_index()
+                yield self.index
+                self._save_index()
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _load_index(self):
+        """
+        Loads the cache index, starting afresh if it is missing or corrupt.
+        """
+        try:
+            with open(self.index_path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save_index(self):
+        """
+        Atomically writes the cache index to disk.
+        """
+        self._atomic_write(self.index_path,
+                           json.dumps(self.index).encode('utf-8'))
+
+    def _atomic_write(self, path, data):
+        """
+        Writes bytes to `path` through a temporary file and a rename, so
+        readers never see a partially written file.
+        """
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir)
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except Exception:
+            os.remove(tmp_path)
+            raise
+
+    @staticmethod
+    def key(URL):
+        """
+        Returns the cache key for a URL or local path.
+        """
+        return hashlib.sha256(URL.encode('utf-8')).hexdigest()
+
+    @staticmethod
+    def is_http(URL):
+        """
+        Returns True if the URL should be fetched over HTTP(S).
+        """
+        return URL.lower().startswith(('http://', 'https://'))
+
+    def _entry_path(self, key):
+        return os.path.join(self.cache_dir, key + '.pkl')
+
+    def _read_entry(self, key):
+        """
+        Loads a cached DataFrame, or returns None if the file is unusable.
+        """
+        try:
+            with open(self._entry_path(key), 'rb') as f:
+                df = pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError) as e:
+            logger.warning(f"Discarding unreadable cache entry {key}. Error: {e}")
+            with self._locked_index():
+                self._remove(key)
+            return None
+        with self._locked_index() as index:
+            if key in index:
+                index[key]['last_access'] = time.time()
+        return df
+
+    def _remove(self, key):
+        self.index.pop(key, None)
+        try:
+            os.remove(self._entry_path(key))
+        except OSError:
+            pass
+
+    def _store(self, key, URL, validator, df):
+        """
+        Pickles a DataFrame into the cache and evicts old entries if needed.
+        """
+        data = pickle.dumps(df, protocol=pickle.HIGHEST_PROTOCOL)
+        with self._locked_index() as index:
+            if len(data) > self.max_bytes:
+                logger.info(f"Not caching {URL}: {len(data)} bytes exceeds the cache size.")
+                self._remove(key)
+                return
+            # Written under the lock, so a concurrent evict() never sees it untracked.
+            self._atomic_write(self._entry_path(key), data)
+            index[key] = {'url': URL, 'validator': validator,
+                          'size': len(data), 'last_access': time.time()}
+            self._evict()
+
+    def _untracked_entries(self):
+        """
+        Returns the keys of entry files on disk that are not in the index,
+        e.g. left behind by a crash or an older cache version.
+        """
+        return [name[:-len('.pkl')] for name in os.listdir(self.cache_dir)
+                if name.endswith('.pkl') and name[:-len('.pkl')] not in self.index]
+
+    def _evict(self):
+        """
+        Removes untracked entry files, then least recently used entries until
+        the cache fits in max_bytes. Must be called holding the index lock.
+        """
+        for key in self._untracked_entries():
+            logger.info(f"Removing untracked entry {key} from the CSV cache.")
+            self._remove(key)
+        total = sum(entry['size'] for entry in self.index.values())
+        for key in sorted(self.index, key=lambda k: self.index[k]['last_access']):
+            if total <= self.max_bytes:
+                break
+            total -= self.index[key]['size']
+            logger.info(f"Evicting {self.index[key]['url']} from the CSV cache.")
+            self._remove(key)
+
+    def evict(self):
+        """
+        Removes least recently used entries until the cache fits in max_bytes.
+        Entry files missing from the index are removed first.
+        """
+        with self._locked_index():
+            self._evict()
+
+    def clear(self):
+        """
+        Removes every entry from the cache.
+        """
+        with self._locked_index():
+            for key in list(self.index) + self._untracked_entries():
+                self._remove(key)
+
+    def _entry_key(self, URL, read_csv_kwargs):
+        return self.key(URL + repr(sorted(read_csv_kwargs.items())))
+
+    def validator(self, URL, **read_csv_kwargs):
+        """
+        Returns the validator (mtime and size, or ETag and Last-Modified) of
+        the cached copy of a CSV file, as of the last `read_csv` call, or
+        None if the file is not cached.
+
+        Parameters:
+        - URL (str): The URL or local path of the CSV file.
+        - read_csv_kwargs: The keyword arguments the file was read with.
+        """
+        entry = self.index.get(self._entry_key(URL, read_csv_kwargs))
+        return entry['validator'] if entry is not None else None
+
+    def read_csv(self, URL, **read_csv_kwargs):
+        """
+        Returns the parsed contents of a CSV file, from the cache when the
+        cached copy is still valid.
+
+        Parameters:
+        - URL (str): The URL or local path of the CSV file.
+        - read_csv_kwargs: Extra keyword arguments passed to `pd.read_csv`.
+        They are part of the cache key, so the same file read with different
+        options is cached separately.
+
+        Returns:
+            DataFrame: The contents of the CSV file.
+        """
+        key = self._entry_key(URL, read_csv_kwargs)
+        # Pick up entries stored by other instances sharing the directory.
+        self.index = self._load_index()
+        if self.is_http(URL):
+            return self._read_http(key, URL, read_csv_kwargs)
+        return self._read_local(key, URL, read_csv_kwargs)
+
+    def _read_local(self, key, URL, read_csv_kwargs):
+        stat = os.stat(URL)
+        validator = {'mtime_ns': stat.st_mtime_ns, 'size': stat.st_size}
+        entry = self.index.get(key)
+        if entry is not None and entry['validator'] == validator:
+            df = self._read_entry(key)
+            if df is not None:
+                logger.info(f"CSV cache hit for {URL}.")
+                return df
+        df = pd.read_csv(URL, **read_csv_kwargs)
+        self._store(key, URL, validator, df)
+        return df
+
+    def _read_http(self, key, URL, read_csv_kwargs):
+        entry = self.index.get(key)
+        request = urllib.request.Request(URL)
+        if entry is not None:
+            if entry['validator'].get('etag'):
+                request.add_header('If-None-Match', entry['validator']['etag'])
+            if entry['validator'].get('last_modified'):
+                request.add_header('If-Modified-Since',
+                                   entry['validator']['last_modified'])
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                body = response.read()
+                validator = {'etag': response.headers.get('ETag'),
+                             'last_modified': response.headers.get('Last-Modified')}
+        except urllib.error.HTTPError as e:
+            if e.code == 304 and entry is not None:
+                df = self._read_entry(key)
+                if df is not None:
+                    logger.info(f"CSV cache hit for {URL} (not modified).")
+                    return df
+                # The cached file vanished; fetch it again unconditionally.
+                return self._read_http(key, URL, read_csv_kwargs)
+            raise e
+        df = pd.read_csv(io.BytesIO(body), **read_csv_kwargs)
+        if validator['etag'] or validator['last_modified']:
+            self._store(key, URL, validator, df)
+        else:
+            logger.info(f"Not caching {URL}: the server sent no ETag or Last-Modified.")
+        return df
+
+
+# Caches shared by every processor configured with the same directory and size.
+_caches = {}
+
+
+def cache_from_config(config_params):
+    """
+    Returns the CSVCache for processor configuration parameters. Processors
+    with the same cache settings share one instance.
+
+    Parameters:
+    config_params (dict): Configuration parameters. The optional keys
+    'csv_cache_dir' and 'csv_cache_max_bytes' configure the cache.
+
+    Returns:
+    CSVCache: The cache, or None if 'csv_cache_dir' is not configured.
+    """
+    if not config_params.get('csv_cache_dir'):
+        return None
+    cache_dir = os.path.abspath(config_params['csv_cache_dir'])
+    max_bytes = config_params.get('csv_cache_max_bytes', CSVCache.DEFAULT_MAX_BYTES)
+    if (cache_dir, max_bytes) not in _caches:
+        _caches[(cache_dir, max_bytes)] = CSVCache(cache_dir, max_bytes)
+    return _caches[(cache_dir, max_bytes)]
@@ -1,6 +1,14 @@
 #!/usr/bin/python3
-from sqlalchemy import create_engine, text
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.engine import make_url
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import atexit
 import logging
+import os
+import threading
+import time
+import urllib.error
 import pandas as pd
 # Name logger for module-specific logs in data_ingestion module.
 logger = logging.getLogger('data_ingestion')
@@ -9,12 +17,45 @@ logging.basicConfig(level=logging.INFO, format='%(asctime)s \
     - %(name)s - %(levelname)s - %(message)s')
 
 
-def create_db_engine(db_path):
+# Connection-level SQLite settings suited to read-heavy workloads: memory-map
+# up to 256 MiB of the file and keep up to 64 MiB of pages in the page cache.
+# {'journal_mode': 'WAL'} can be added as well, but note that it is persisted
+# in the database file itself.
+SQLITE_READ_PRAGMAS = {'mmap_size': 268435456, 'cache_size': -65536}
+
+# Process-wide engines handed out by get_db_engine, keyed by database URL.
+_engines = {}
+_engines_lock = threading.Lock()
+
+# Process-wide weather station lookups, keyed by mapping CSV location and
+# holding the validator of the source they were read from.
+_station_lookups = {}
+_station_lookups_lock = threading.Lock()
+
+
+def _set_sqlite_pragmas(engine, sqlite_pragmas):
+    """
+    Registers a listener that applies PRAGMA statements to every new
+    DBAPI connection opened by a SQLite engine.
+    """
+    @event.listens_for(engine, "connect")
+    def apply_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in sqlite_pragmas.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+        cursor.close()
+
+
+def create_db_engine(db_path, sqlite_pragmas=None, **engine_kwargs):
     """
     Creates a SQLAlchemy database engine object.
 
     Parameters:
     db_path (str): The path to the SQLite database.
+    sqlite_pragmas (dict): Optional PRAGMA name/value pairs applied to each
+    new connection when the database is SQLite.
+    engine_kwargs: Extra keyword arguments passed to `create_engine`,
+    e.g. pool_size or pool_pre_ping.
 
     Returns:
     engine: The SQLAlchemy database engine object.
@@ -24,7 +65,9 @@ def create_db_engine(db_path):
     Exception: If failed to create the database engine.
     """
     try:
-        engine = create_engine(db_path)
+        engine = create_engine(db_path, **engine_kwargs)
+        if sqlite_pragmas and engine.dialect.name == 'sqlite':
+            _set_sqlite_pragmas(engine, sqlite_pragmas)
         # Test connection
         with engine.connect() as conn:
             pass
@@ -40,7 +83,63 @@ def create_db_engine(db_path):
         raise e
 
 
-def query_data(engine, sql_query):
+def get_db_engine(db_path, pool_size=5, max_overflow=10, pool_pre_ping=True,
+                  sqlite_pragmas=SQLITE_READ_PRAGMAS):
+    """
+    Returns the shared SQLAlchemy engine for a database URL, creating it on
+    first use.
+
+    Engines are kept in a process-wide registry so that every caller using
+    the same URL shares one connection pool instead of building a new engine
+    per call. The pool options only take effect when the engine is created.
+
+    Parameters:
+    db_path (str): The database URL.
+    pool_size (int): Connections kept open in the pool. Defaults to 5.
+    max_overflow (int): Extra connections allowed beyond pool_size.
+    Defaults to 10.
+    pool_pre_ping (bool): Test connections for liveness on checkout.
+    Defaults to True.
+    sqlite_pragmas (dict): PRAGMA settings applied to SQLite connections.
+    Defaults to SQLITE_READ_PRAGMAS; pass None to leave SQLite untouched.
+
+    Returns:
+    engine: The shared SQLAlchemy database engine object.
+    """
+    with _engines_lock:
+        engine = _engines.get(db_path)
+        if engine is None:
+            engine_kwargs = {'pool_pre_ping': pool_pre_ping}
+            url = make_url(db_path)
+            # In-memory SQLite uses a single-connection pool without sizing.
+            if not (url.get_backend_name() == 'sqlite'
+                    and url.database in (None, '', ':memory:')):
+                engine_kwargs['pool_size'] = pool_size
+                engine_kwargs['max_overflow'] = max_overflow
+            engine = create_db_engine(db_path, sqlite_pragmas, **engine_kwargs)
+            _engines[db_path] = engine
+        return engine
+
+
+def dispose_engines():
+    """
+    Disposes every engine in the registry, closing their pooled connections.
+
+    This is registered to run at interpreter exit and can also be called
+    explicitly, e.g. when a service shuts down or after forking.
+    """
+    with _engines_lock:
+        for engine in _engines.values():
+            engine.dispose()
+        if _engines:
+            logger.info(f"Disposed {len(_engines)} database engine(s).")
+        _engines.clear()
+
+
+atexit.register(dispose_engines)
+
+
+def query_data(engine, sql_query, params=None, allow_empty=False):
     """
     Executes a SQL query on the given database engine \
         and returns the result as a DataFrame.
@@ -48,18 +147,22 @@ def query_data(engine, sql_query):
     Parameters:
     engine: The SQLAlchemy database engine object.
     sql_query (str): The SQL query to be executed.
+    params (dict): Optional values for the query's :name bind parameters.
+    allow_empty (bool): Return an empty DataFrame instead of raising when
+        the query returns no rows. Defaults to False.
 
     Returns:
     DataFrame: The result of the SQL query as a DataFrame.
 
     Raises:
-    ValueError: If the query returns an empty DataFrame.
+    ValueError: If the query returns an empty DataFrame and allow_empty
+        is not set.
     Exception: If an error occurs while executing the query.
     """
     try:
         with engine.connect() as connection:
-            df = pd.read_sql_query(text(sql_query), connection)
-        if df.empty:
+            df = pd.read_sql_query(text(sql_query), connection, params=params)
+        if df.empty and not allow_empty:
             # Log a message or handle the empty DataFrame scenario as needed
             msg = "The query returned an empty DataFrame."
             logger.error(msg)
@@ -75,12 +178,139 @@ def query_data(engine, sql_query):
         raise e
 
 
-def read_from_web_CSV(URL):
+def query_data_chunks(engine, sql_query, chunksize=10000):
+    """
+    Executes a SQL query on the given database engine \
+        and yields the result as a sequence of DataFrame batches.
+
+    Rows are streamed from the database cursor, so at most `chunksize`
+    rows are held in memory at once.
+
+    Parameters:
+    engine: The SQLAlchemy database engine object.
+    sql_query (str): The SQL query to be executed.
+    chunksize (int): The number of rows per batch. Defaults to 10000.
+
+    Yields:
+    DataFrame: The next batch of rows returned by the SQL query.
+
+    Raises:
+    ValueError: If the query returns no rows or chunksize is not positive.
+    Exception: If an error occurs while executing the query.
+    """
+    if chunksize <= 0:
+        msg = "chunksize must be a positive integer."
+        logger.error(msg)
+        raise ValueError(msg)
+    try:
+        n_batches = 0
+        with engine.connect() as connection:
+            connection = connection.execution_options(stream_results=True)
+            for df in pd.read_sql_query(text(sql_query), connection,
+                                        chunksize=chunksize):
+                if df.empty:
+                    continue
+                n_batches += 1
+                yield df
+        if n_batches == 0:
+            msg = "The query returned an empty DataFrame."
+            logger.error(msg)
+            raise ValueError(msg)
+        logger.info(f"Query streamed successfully in {n_batches} batches.")
+    except ValueError as e:
+        logger.error(f"SQL query failed. Error: {e}")
+        raise e
+    except Exception as e:
+        logger.error(f"An error occurred while querying the database. \
+            Error: {e}")
+        raise e
+
+
+def _read_table(engine, table, columns, key):
+    """
+    Reads the requested columns of one table on its own connection and
+    returns the DataFrame together with the elapsed wall time in seconds.
+    """
+    quote = engine.dialect.identifier_preparer.quote
+    if columns is None:
+        select_list = '*'
+    else:
+        columns = [key] + [col for col in columns if col != key]
+        select_list = ', '.join(quote(col) for col in columns)
+    start = time.perf_counter()
+    with engine.connect() as connection:
+        df = pd.read_sql_query(
+            text(f"SELECT {select_list} FROM {quote(table)}"), connection)
+    return df, time.perf_counter() - start
+
+
+def query_tables_parallel(engine, tables, key='Field_ID', max_workers=None):
+    """
+    Reads several tables concurrently and left-joins them on a key column,
+    as an alternative to a single multi-way SQL JOIN.
+
+    Each table is read by its own thread over its own pooled connection,
+    selecting only the requested columns. The frames are then joined in
+    pandas on `key`, in the order given, with the first table on the left,
+    which reproduces `SELECT ... FROM t1 LEFT JOIN t2 USING (key) ...`.
+
+    Parameters:
+    engine: The SQLAlchemy database engine object.
+    tables (dict): Table names mapped to the list of columns to read,
+    or to None to read every column. The key column is always read.
+    key (str): The column to join on. Defaults to 'Field_ID'.
+    max_workers (int): Number of reader threads. Defaults to one per table.
+
+    Returns:
+    tuple: The joined DataFrame and a dict of per-table read times in seconds.
+
+    Raises:
+    ValueError: If no tables are given or the joined result is empty.
+    Exception: If an error occurs while querying the database.
+    """
+    if not tables:
+        msg = "At least one table is required."
+        logger.error(msg)
+        raise ValueError(msg)
+    try:
+        with ThreadPoolExecutor(max_workers=max_workers or len(tables)) as pool:
+            futures = {table: pool.submit(_read_table, engine, table,
+                                          columns, key)
+                       for table, columns in tables.items()}
+            results = {table: future.result()
+                       for table, future in futures.items()}
+        timings = {table: elapsed for table, (_, elapsed) in results.items()}
+        frames = [df for df, _ in results.values()]
+        df = frames[0]
+        for right in frames[1:]:
+            df = df.join(right.set_index(key), on=key, how='left')
+        df = df.reset_index(drop=True)
+        if df.empty:
+            msg = "The query returned an empty DataFrame."
+            logger.error(msg)
+            raise ValueError(msg)
+        for table, elapsed in timings.items():
+            logger.info(f"Read table '{table}' in {elapsed:.3f}s.")
+        return df, timings
+    except ValueError as e:
+        logger.error(f"SQL query failed. Error: {e}")
+        raise e
+    except Exception as e:
+        logger.error(f"An error occurred while querying the database. \
+            Error: {e}")
+        raise e
+
+
+def read_from_web_CSV(URL, cache=None, **read_csv_kwargs):
     """
     Reads a CSV file from the web and returns its contents as a DataFrame.
 
     Parameters:
     URL (str): The URL of the CSV file to be read.
+    cache (CSVCache): Optional on-disk cache. When given, the parsed file is
+    served from the cache as long as the source has not changed.
+    read_csv_kwargs: Extra keyword arguments passed to `pd.read_csv`,
+    e.g. usecols.
 
     Returns:
     DataFrame: The contents of the CSV file as a DataFrame.
@@ -90,7 +320,10 @@ def read_from_web_CSV(URL):
     Exception: If failed to read the CSV file from the web.
     """
     try:
-        df = pd.read_csv(URL)
+        if cache is not None:
+            df = cache.read_csv(URL, **read_csv_kwargs)
+        else:
+            df = pd.read_csv(URL, **read_csv_kwargs)
         logger.info("CSV file read successfully from the web.")
         return df
     except pd.errors.EmptyDataError as e:
@@ -100,3 +333,252 @@ def read_from_web_CSV(URL):
     except Exception as e:
         logger.error(f"Failed to read CSV from the web. Error: {e}")
         raise e
+
+
+def read_weather_station_lookup(URL, cache=None, reload=False):
+    """
+    Returns the Field_ID to Weather_station mapping as a Series indexed by
+    Field_ID, reading the mapping CSV only when it changed.
+
+    Only the two needed columns are parsed. The lookup is kept in a
+    process-wide registry so that every processor instance and every batch
+    shares one copy, and is revalidated on every call: a local file by its
+    mtime and size, a URL through the cache's ETag or Last-Modified. A URL
+    read without a cache cannot be revalidated and is read on every call.
+
+    Parameters:
+    URL (str): The URL of the weather station mapping CSV.
+    cache (CSVCache): Optional on-disk cache used when the CSV is read.
+    reload (bool): Read the CSV again even if a lookup is already loaded.
+    Defaults to False.
+
+    Returns:
+    Series: Weather_station values indexed by Field_ID.
+
+    Raises:
+    ValueError: If a Field_ID is mapped to more than one weather station.
+    """
+    usecols = ['Field_ID', 'Weather_station']
+    with _station_lookups_lock:
+        df = None
+        if not URL.lower().startswith(('http://', 'https://')):
+            stat = os.stat(URL)
+            validator = {'mtime_ns': stat.st_mtime_ns, 'size': stat.st_size}
+        elif cache is not None:
+            # A conditional request, answered from the cache while unchanged.
+            df = read_from_web_CSV(URL, cache, usecols=usecols)
+            validator = cache.validator(URL, usecols=usecols)
+        else:
+            validator = None
+        registered = _station_lookups.get(URL)
+        if registered is not None and not reload and validator is not None \
+                and registered[0] == validator:
+            return registered[1]
+        if df is None:
+            df = read_from_web_CSV(URL, cache, usecols=usecols)
+        lookup = df.set_index('Field_ID')['Weather_station'].sort_index()
+        if not lookup.index.is_unique:
+            msg = "The weather station mapping has duplicate Field_IDs."
+            logger.error(msg)
+            raise ValueError(msg)
+        _station_lookups[URL] = (validator, lookup)
+        return lookup
+
+
+# File extensions understood by write_columnar and read_columnar.
+PARQUET_EXTENSIONS = ('.parquet', '.pq')
+FEATHER_EXTENSIONS = ('.feather', '.arrow', '.ipc')
+
+
+def _columnar_format(path):
+    """
+    Returns 'parquet' or 'feather' depending on the extension of path.
+    """
+    extension = os.path.splitext(path)[1].lower()
+    if extension in PARQUET_EXTENSIONS:
+        return 'parquet'
+    if extension in FEATHER_EXTENSIONS:
+        return 'feather'
+    msg = f"Unsupported columnar file extension '{extension}'. \
+        Use one of {PARQUET_EXTENSIONS + FEATHER_EXTENSIONS}."
+    logger.error(msg)
+    raise ValueError(msg)
+
+
+def write_columnar(df, path):
+    """
+    Writes a DataFrame to a Parquet or Arrow IPC (Feather) file, chosen by
+    the file extension. Column dtypes, including categories, are preserved.
+
+    Parameters:
+    df (DataFrame): The DataFrame to write.
+    path (str): The destination file path.
+
+    Raises:
+    ImportError: If pyarrow is not installed.
+    ValueError: If the file extension is not supported.
+    """
+    file_format = _columnar_format(path)
+    try:
+        if file_format == 'parquet':
+            df.to_parquet(path)
+        else:
+            df.to_feather(path)
+        logger.info(f"Wrote {len(df)} rows to {path}.")
+    except ImportError as e:
+        logger.error("pyarrow is required to write columnar files. \
+            Please install it first.")
+        raise e
+
+
+def read_columnar(path, columns=None, memory_map=True):
+    """
+    Reads a Parquet or Arrow IPC (Feather) file written by write_columnar.
+
+    Parameters:
+    path (str): The file path.
+    columns (list): Optional subset of columns to read; the other columns
+    are never loaded.
+    memory_map (bool): Memory-map the file instead of reading it into
+    memory first. Uncompressed Arrow IPC files can then be read without
+    copying. Defaults to True.
+
+    Returns:
+    DataFrame: The contents of the file.
+
+    Raises:
+    ImportError: If pyarrow is not installed.
+    ValueError: If the file extension is not supported.
+    """
+    file_format = _columnar_format(path)
+    try:
+        if file_format == 'parquet':
+            df = pd.read_parquet(path, columns=columns, memory_map=memory_map)
+        else:
+            from pyarrow import feather
+            df = feather.read_table(path, columns=columns,
+                                    memory_map=memory_map).to_pandas()
+        logger.info(f"Read {len(df)} rows from {path}.")
+        return df
+    except ImportError as e:
+        logger.error("pyarrow is required to read columnar files. \
+            Please install it first.")
+        raise e
+
+
+def _is_transient(error):
+    """
+    Returns True for errors worth retrying: timeouts and failed connections.
+    HTTP error responses (e.g. 404) and database errors are not retried.
+    """
+    if isinstance(error, urllib.error.HTTPError):
+        return False
+    return isinstance(error, (asyncio.TimeoutError, TimeoutError,
+                              ConnectionError, urllib.error.URLError))
+
+
+async def _run_in_thread(func, *args, semaphore=None, timeout=None, **kwargs):
+    """
+    Runs a blocking function in a worker thread and waits up to `timeout`
+    seconds for it. The semaphore slot is held until the thread finishes,
+    even after a timeout, since threads cannot be interrupted; a timed-out
+    read therefore keeps counting against the concurrency bound.
+    """
+    if semaphore is not None:
+        await semaphore.acquire()
+    try:
+        task = asyncio.ensure_future(asyncio.to_thread(func, *args, **kwargs))
+    except BaseException:
+        if semaphore is not None:
+            semaphore.release()
+        raise
+    if semaphore is not None:
+        task.add_done_callback(lambda _: semaphore.release())
+    return await asyncio.wait_for(asyncio.shield(task), timeout)
+
+
+async def _call_async(func, *args, semaphore=None, timeout=None, retries=2,
+                      backoff=0.5, **kwargs):
+    """
+    Runs a blocking function in a worker thread with bounded concurrency,
+    a timeout and retries with exponential backoff.
+
+    Only timeouts and connection errors are retried. A timed-out call stops
+    being awaited, but its worker thread runs to completion in the
+    background and keeps its semaphore slot until then.
+    """
+    for attempt in range(retries + 1):
+        try:
+            return await _run_in_thread(func, *args, semaphore=semaphore,
+                                        timeout=timeout, **kwargs)
+        except Exception as e:
+            if attempt == retries or not _is_transient(e):
+                raise e
+            delay = backoff * 2 ** attempt
+            logger.warning(f"{func.__name__} failed ({e!r}), \
+                retrying in {delay:.1f}s.")
+            await asyncio.sleep(delay)
+
+
+async def read_csv_async(URL, cache=None, semaphore=None, timeout=None,
+                         retries=2, backoff=0.5, **read_csv_kwargs):
+    """
+    Asynchronous version of read_from_web_CSV, so many CSV files can be
+    fetched concurrently.
+
+    Parameters:
+    URL (str): The URL of the CSV file to be read.
+    cache (CSVCache): Optional on-disk cache, see read_from_web_CSV.
+    semaphore (asyncio.Semaphore): Optional semaphore bounding how many
+    reads and queries run at once.
+    timeout (float): Seconds to wait for each attempt. Defaults to no limit.
+    retries (int): Number of retries after a failed attempt. Defaults to 2.
+    backoff (float): Delay before the first retry, doubled for each further
+    retry. Defaults to 0.5 seconds.
+    read_csv_kwargs: Extra keyword arguments passed to `pd.read_csv`.
+
+    Returns:
+    DataFrame: The contents of the CSV file as a DataFrame.
+    """
+    return await _call_async(read_from_web_CSV, URL, cache,
+                             semaphore=semaphore, timeout=timeout,
+                             retries=retries, backoff=backoff,
+                             **read_csv_kwargs)
+
+
+async def read_weather_station_lookup_async(URL, cache=None, semaphore=None,
+                                            timeout=None, retries=2,
+                                            backoff=0.5):
+    """
+    Asynchronous version of read_weather_station_lookup.
+
+    Parameters:
+    URL (str): The URL of the weather station mapping CSV.
+    cache (CSVCache): Optional on-disk cache used when the CSV is read.
+    semaphore, timeout, retries, backoff: As for read_csv_async.
+
+    Returns:
+    Series: Weather_station values indexed by Field_ID.
+    """
+    return await _call_async(read_weather_station_lookup, URL, cache,
+                             semaphore=semaphore, timeout=timeout,
+                             retries=retries, backoff=backoff)
+
+
+async def query_data_async(engine, sql_query, semaphore=None, timeout=None,
+                           retries=2, backoff=0.5):
+    """
+    Asynchronous version of query_data, so queries against several
+    databases can run concurrently.
+
+    Parameters:
+    engine: The SQLAlchemy database engine object.
+    sql_query (str): The SQL query to be executed.
+    semaphore, timeout, retries, backoff: As for read_csv_async.
+
+    Returns:
+    DataFrame: The result of the SQL query as a DataFrame.
+    """
+    return await _call_async(query_data, engine, sql_query,
+                             semaphore=semaphore, timeout=timeout,
+                             retries=retries, backoff=backoff)
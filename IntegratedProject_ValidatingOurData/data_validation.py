@@ -0,0 +1,147 @@
+import logging
+import numpy as np
+import pandas as pd
+# Name logger for module-specific logs in data_validation module.
+logger = logging.getLogger('data_validation')
+
+# Rules checked on the processed field data. Each rule names a column, a
+# check and the value the check compares against.
+FIELD_DATA_RULES = [
+    {'name': 'non_negative_elevation', 'column': 'Elevation',
+     'check': 'ge', 'value': 0},
+    {'name': 'valid_crop_type', 'column': 'Crop_type', 'check': 'isin',
+     'value': ['cassava', 'tea', 'wheat', 'potato', 'banana', 'coffee',
+               'rice', 'maize']},
+    {'name': 'positive_rainfall', 'column': 'Rainfall',
+     'check': 'gt', 'value': 0},
+]
+
+# Rules checked on the processed weather data.
+WEATHER_DATA_RULES = [
+    {'name': 'valid_measurement', 'column': 'Measurement', 'check': 'isin',
+     'value': ['Rainfall', 'Temperature', 'Pollution_level']},
+    {'name': 'value_extracted', 'column': 'Value', 'check': 'notnull'},
+]
+
+
+class DataValidator:
+
+    # Functions returning the mask of values that pass each check.
+    CHECKS = {
+        'ge': lambda values, value: values >= value,
+        'gt': lambda values, value: values > value,
+        'le': lambda values, value: values <= value,
+        'lt': lambda values, value: values < value,
+        'isin': lambda values, value: values.isin(value),
+        'notnull': lambda values, value: values.notna(),
+    }
+
+    def __init__(self, rules, id_column='Field_ID', sample_size=5):
+        """
+        Initialize the DataValidator with a declarative rule set.
+
+        Parameters:
+        - rules (list): Rules as dictionaries with a 'name', the 'column' to
+        check, a 'check' from CHECKS and, except for 'notnull', a 'value'.
+        - id_column (str): Column whose values identify offending rows in the
+        report. Defaults to 'Field_ID'.
+        - sample_size (int): Number of offending ids kept per rule.
+        Defaults to 5.
+        """
+        for rule in rules:
+            if rule['check'] not in self.CHECKS:
+                raise ValueError(f"Unknown check '{rule['check']}' in rule '{rule['name']}'.")
+        self.rules = rules
+        self.id_column = id_column
+        self.sample_size = sample_size
+
+    def _passing(self, values, rule):
+        """
+        Returns a boolean array marking the values that satisfy a rule.
+        Missing values never satisfy a comparison or membership check.
+        """
+        if isinstance(values.dtype, pd.CategoricalDtype) and rule['check'] != 'notnull':
+            # Evaluate the rule once per category instead of once per row.
+            category_passes = self.CHECKS[rule['check']](
+                pd.Series(values.cat.categories), rule.get('value')).to_numpy(dtype=bool)
+            codes = values.cat.codes.to_numpy()
+            return np.where(codes >= 0, category_passes[codes], False)
+        passes = self.CHECKS[rule['check']](values, rule.get('value'))
+        return passes.to_numpy(dtype=bool, na_value=False)
+
+    def validate(self, df):
+        """
+        Evaluates every rule against a DataFrame.
+
+        Rules are grouped by column so each column is fetched once and all
+        of its rules run as vectorized operations over it.
+
+        Parameters:
+        - df (DataFrame): The data to validate, e.g. one streamed batch.
+
+        Returns:
+            dict: For each rule name, the 'column', 'check', number of
+            'rows' checked, number of 'violations' and a 'sample' of offending
+            ids. A missing column counts every row as a violation.
+        """
+        report = {}
+        ids = df[self.id_column] if self.id_column in df.columns else pd.Series(df.index)
+        rules_by_column = {}
+        for rule in self.rules:
+            rules_by_column.setdefault(rule['column'], []).append(rule)
+        for column, rules in rules_by_column.items():
+            values = df[column] if column in df.columns else None
+            if values is None:
+                logger.warning(f"Column '{column}' not found, all rows fail its rules.")
+            for rule in rules:
+                if values is None:
+                    failing = np.ones(len(df), dtype=bool)
+                else:
+                    failing = ~self._passing(values, rule)
+                report[rule['name']] = {
+                    'column': column, 'check': rule['check'], 'rows': len(df),
+                    'violations': int(failing.sum()),
+                    'sample': ids.to_numpy()[failing][:self.sample_size].tolist(),
+                }
+        return report
+
+    def combine_reports(self, first, second):
+        """
+        Merges the reports of two batches into one report.
+        """
+        combined = {}
+        for name, result in first.items():
+            other = second[name]
+            combined[name] = dict(
+                result, rows=result['rows'] + other['rows'],
+                violations=result['violations'] + other['violations'],
+                sample=(result['sample'] + other['sample'])[:self.sample_size])
+        return combined
+
+    def validate_batches(self, batches):
+        """
+        Validates a sequence of DataFrame batches, e.g. the output of
+        `FieldDataProcessor.process_stream`, one batch at a time.
+
+        Returns:
+            dict: The combined report of all batches, as from `validate`.
+        """
+        report = None
+        for batch in batches:
+            batch_report = self.validate(batch)
+            report = batch_report if report is None else self.combine_reports(report, batch_report)
+        return report
+
+    @staticmethod
+    def passed(report):
+        """
+        Returns True if no rule in a report has any violations.
+        """
+        return all(result['violations'] == 0 for result in report.values())
+
+    @staticmethod
+    def summary(report):
+        """
+        Returns a report as a DataFrame with one row per rule.
+        """
+        return pd.DataFrame.from_dict(report, orient='index')
@@ -1,8 +1,15 @@
-import re
+import asyncio
+import os
 import numpy as np
 import pandas as pd
 import logging
-from data_ingestion import create_db_engine, query_data, read_from_web_CSV
+from data_ingestion import get_db_engine, query_data, query_data_async, \
+    query_data_chunks, query_tables_parallel, read_columnar, \
+    read_weather_station_lookup, read_weather_station_lookup_async, \
+    write_columnar
+from csv_cache import cache_from_config
+from data_validation import DataValidator, FIELD_DATA_RULES
+from instrumentation import metrics_from_config
 
 
 class FieldDataProcessor:
@@ -21,11 +28,28 @@ class FieldDataProcessor:
         self.columns_to_rename = config_params['columns_to_rename']
         self.values_to_rename = config_params['values_to_rename']
         self.weather_map_data = config_params['weather_mapping_csv']
+        # Optional pool settings for the shared database engine
+        self.engine_options = config_params.get('engine_options', {})
+        # Optional {table: columns} to read in parallel instead of sql_query
+        self.sql_tables = config_params.get('sql_tables')
+        # Optional file holding the last output for incremental runs
+        self.snapshot_path = config_params.get('snapshot_path')
+        # Table whose rowids mark new rows; defaults to the first table in sql_query
+        self.incremental_table = config_params.get('incremental_table')
+        # Optionally shrink the processed DataFrame with compact dtypes
+        self.optimize_memory = config_params.get('optimize_dtypes', False)
+        self.validation_rules = config_params.get('validation_rules', FIELD_DATA_RULES)
+        # Per-stage timings and memory, recorded when 'collect_metrics' is set
+        self.metrics = metrics_from_config(config_params, 'field')
+        # Optional on-disk cache for the weather station mapping CSV
+        self.csv_cache = cache_from_config(config_params)
 
         self.initialize_logging(logging_level)
 
         self.df = None
         self.engine = None
+        self.table_timings = {}
+        self.memory_report = None
 
     def initialize_logging(self, logging_level):
         """
@@ -65,7 +89,7 @@ class FieldDataProcessor:
             DataFrame: The DataFrame containing the fetched data.
         """
         try:
-            self.engine = create_db_engine(self.db_path)
+            self.engine = get_db_engine(self.db_path, **self.engine_options)
             self.df = query_data(self.engine, self.sql_query)
             self.logger.info("Sucessfully loaded data.")
             return self.df
@@ -73,6 +97,28 @@ class FieldDataProcessor:
             self.logger.error(f"Failed to ingest SQL data. Error: {e}")
             raise e
 
+    def ingest_sql_tables(self):
+        """
+        Fetches the tables listed in `sql_tables` in parallel and joins
+        them on 'Field_ID', instead of running the joined `sql_query`.
+
+        The time spent reading each table is stored in `table_timings`.
+
+        Returns:
+            DataFrame: The DataFrame containing the fetched data.
+        """
+        try:
+            self.engine = get_db_engine(self.db_path, **self.engine_options)
+            self.df, self.table_timings = query_tables_parallel(
+                self.engine, self.sql_tables)
+            slowest = max(self.table_timings, key=self.table_timings.get)
+            self.logger.info(f"Sucessfully loaded data. Slowest table: "
+                             f"'{slowest}' ({self.table_timings[slowest]:.3f}s).")
+            return self.df
+        except Exception as e:
+            self.logger.error(f"Failed to ingest SQL tables. Error: {e}")
+            raise e
+
     def rename_columns(self):
         """
         Renames specified columns in the DataFrame.
@@ -118,22 +164,134 @@ class FieldDataProcessor:
             }
             return corrections.get(crop, crop)  # Get the corrected crop type, or return the original if not in corrections
 
-        # Apply the correction function to the specified column
+        # Apply the correction function to the specified column. The function
+        # runs once per distinct value rather than once per row: the column is
+        # viewed as categories and the corrected categories are merged where
+        # two of them collapse onto the same value.
         if column_name in self.df.columns:
-            self.df[column_name] = self.df[column_name].apply(correct_crop_type)
+            column = self.df[column_name]
+            is_category = isinstance(column.dtype, pd.CategoricalDtype)
+            categorical = column.array if is_category else pd.Categorical(column)
+            category_codes, categories = pd.factorize(
+                categorical.categories.map(correct_crop_type))
+            codes = categorical.codes
+            corrected = pd.Categorical.from_codes(
+                np.where(codes >= 0, category_codes[codes], -1), categories)
+            if is_category:
+                self.df[column_name] = corrected
+            else:
+                self.df[column_name] = pd.Series(
+                    corrected, index=column.index).astype(column.dtype)
             self.logger.info(f"Applied corrections to '{column_name}' column.")
         else:
             self.logger.warning(f"Column '{column_name}' not found in DataFrame.")
 
-    def weather_station_mapping(self):
+    def weather_station_mapping(self, station_lookup=None):
+        """
+        Adds the 'Weather_station' of every field to the DataFrame.
+
+        The mapping CSV is loaded into a lookup indexed by 'Field_ID'
+        (shared by all processors and reread only when the CSV changes, see
+        `read_weather_station_lookup`) and each field is resolved with a
+        vectorized index lookup. Fields
+        missing from the mapping get NaN, as with a left merge.
+
+        Parameters:
+        - station_lookup (Series): Optional, already loaded lookup.
+        When omitted it is fetched for `weather_mapping_csv`.
+
+        Returns:
+            Series: The weather station lookup that was used.
+        """
+        if station_lookup is None:
+            station_lookup = read_weather_station_lookup(self.weather_map_data,
+                                                         self.csv_cache)
+        positions = station_lookup.index.get_indexer(self.df['Field_ID'])
+        if (positions >= 0).all():
+            self.df['Weather_station'] = station_lookup.to_numpy()[positions]
+        else:
+            self.df['Weather_station'] = self.df['Field_ID'].map(station_lookup)
+        self.logger.info("Mapped fields to weather stations.")
+        return station_lookup
+
+    def optimize_dtypes(self, max_category_ratio=0.5):
+        """
+        Converts the DataFrame to compact dtypes without losing information.
+
+        String columns with few distinct values become 'category', integer
+        columns are downcast to the smallest integer type that holds them,
+        and float columns become float32 when every value survives the round
+        trip unchanged. The memory used before and after is stored in
+        `memory_report`.
+
+        Parameters:
+        - max_category_ratio (float): Largest ratio of distinct values to rows
+        for which a string column is converted to 'category'. Defaults to 0.5.
+
+        Returns:
+            dict: Bytes used before and after the conversion.
+        """
+        bytes_before = int(self.df.memory_usage(deep=True).sum())
+        for column in self.df.columns:
+            series = self.df[column]
+            if pd.api.types.is_object_dtype(series) or pd.api.types.is_string_dtype(series):
+                if series.nunique(dropna=False) <= max_category_ratio * len(series):
+                    self.df[column] = series.astype('category')
+            elif pd.api.types.is_integer_dtype(series):
+                self.df[column] = pd.to_numeric(series, downcast='integer')
+            elif pd.api.types.is_float_dtype(series):
+                downcast = series.astype(np.float32)
+                if downcast.astype(series.dtype).equals(series):
+                    self.df[column] = downcast
+        bytes_after = int(self.df.memory_usage(deep=True).sum())
+        self.memory_report = {'bytes_before': bytes_before, 'bytes_after': bytes_after}
+        self.logger.info(f"Optimized dtypes: {bytes_before} -> {bytes_after} bytes.")
+        return self.memory_report
+
+    def validate(self, rules=None):
         """
-        Fetches weather station mapping data from a CSV file.
+        Checks the processed field data against a rule set in-process.
+
+        Parameters:
+        - rules (list): Rules as accepted by `DataValidator`. Defaults to the
+        'validation_rules' configuration parameter, or FIELD_DATA_RULES.
 
         Returns:
-            DataFrame: The DataFrame containing the weather station mapping data.
+            dict: The validation report, see `DataValidator.validate`.
+        """
+        validator = DataValidator(rules or self.validation_rules, id_column='Field_ID')
+        report = validator.validate(self.df)
+        if validator.passed(report):
+            self.logger.info("All validation rules passed.")
+        else:
+            failed = [name for name, result in report.items() if result['violations']]
+            self.logger.warning(f"Validation rules failed: {failed}")
+        return report
+
+    def export_data(self, path):
+        """
+        Writes the processed field data to a columnar file.
+
+        Parameters:
+        - path (str): Destination path. A '.parquet' extension writes
+        Parquet and '.feather' or '.arrow' writes Arrow IPC.
+        """
+        write_columnar(self.df, path)
+
+    def import_data(self, path, columns=None, memory_map=True):
         """
-        weather_map_df = read_from_web_CSV(self.weather_map_data)
-        self.df = self.df.merge(weather_map_df, on='Field_ID',how='left')
+        Loads field data written by `export_data` into `df`.
+
+        Parameters:
+        - path (str): Path of the columnar file.
+        - columns (list): Optional subset of columns to load.
+        - memory_map (bool): Memory-map the file. Defaults to True.
+
+        Returns:
+            DataFrame: The loaded data.
+        """
+        self.df = read_columnar(path, columns, memory_map)
+        return self.df
 
     def process(self):
         """
@@ -142,17 +300,273 @@ class FieldDataProcessor:
         This method sequentially calls all the necessary methods to process the data.
         """
         # Step 1: Ingest SQL data
-        self.ingest_sql_data()
+        with self.metrics.stage('ingest') as stage:
+            if self.sql_tables:
+                self.ingest_sql_tables()
+            else:
+                self.ingest_sql_data()
+            stage.rows_out = len(self.df)
 
         # Step 2: Rename columns
-        self.rename_columns()
+        with self.metrics.stage('rename', len(self.df)) as stage:
+            self.rename_columns()
+            stage.rows_out = len(self.df)
 
         # Step 3: Apply corrections
-        self.apply_corrections()
+        with self.metrics.stage('corrections', len(self.df)) as stage:
+            self.apply_corrections()
+            stage.rows_out = len(self.df)
 
         # Step 4: Weather station mapping
-        self.weather_station_mapping()
-        
-        # Remove any columns with names containing 'Unnamed' followed by any number
-        unnamed_columns = [col for col in self.df.columns if re.match(r'^Unnamed:\s*\d*$', col)]
-        self.df.drop(columns=unnamed_columns, inplace=True)
+        with self.metrics.stage('mapping', len(self.df)) as stage:
+            self.weather_station_mapping()
+            stage.rows_out = len(self.df)
+
+        # Step 5: Optionally switch to compact dtypes
+        if self.optimize_memory:
+            with self.metrics.stage('optimize_dtypes', len(self.df)) as stage:
+                self.optimize_dtypes()
+                stage.rows_out = len(self.df)
+
+    async def process_async(self, semaphore=None, timeout=None, retries=2):
+        """
+        Executes the data processing pipeline without blocking the event loop.
+
+        The SQL query and the weather station mapping are fetched concurrently
+        in worker threads, so many processors can refresh at the same time;
+        the in-memory cleaning steps then run as in `process()`.
+
+        Parameters:
+        - semaphore (asyncio.Semaphore): Optional semaphore shared between
+        processors to bound how many sources are read at once.
+        - timeout (float): Seconds to wait for each read attempt.
+        - retries (int): Number of retries after a failed read. Defaults to 2.
+
+        Returns:
+            DataFrame: The processed data, also stored in `self.df`.
+        """
+        self.engine = await asyncio.to_thread(get_db_engine, self.db_path,
+                                              **self.engine_options)
+        self.df, station_lookup = await asyncio.gather(
+            query_data_async(self.engine, self.sql_query, semaphore,
+                             timeout, retries),
+            read_weather_station_lookup_async(self.weather_map_data,
+                                              self.csv_cache, semaphore,
+                                              timeout, retries))
+        self.rename_columns()
+        self.apply_corrections()
+        self.weather_station_mapping(station_lookup)
+        if self.optimize_memory:
+            self.optimize_dtypes()
+        return self.df
+
+    def process_stream(self, chunksize=10000):
+        """
+        Executes the data processing pipeline one batch of rows at a time.
+
+        The SQL query is streamed in batches of `chunksize` rows and each batch
+        is renamed, corrected and mapped to weather stations before
+        it is yielded, so memory use is bounded by the batch size rather than by
+        the size of the survey.
+
+        Parameters:
+        - chunksize (int): The number of rows per batch. Defaults to 10000.
+
+        Yields:
+            DataFrame: The next fully processed batch. The batch is also
+            available as `self.df` until the next one is produced.
+        """
+        self.engine = get_db_engine(self.db_path, **self.engine_options)
+        station_lookup = None
+        for batch in query_data_chunks(self.engine, self.sql_query, chunksize):
+            self.df = batch
+            self.rename_columns()
+            self.apply_corrections()
+            station_lookup = self.weather_station_mapping(station_lookup)
+            yield self.df
+
+    def load_snapshot(self, snapshot_path):
+        """
+        Loads one of the files written by the last incremental run.
+
+        Parameters:
+        - snapshot_path (str): Path of the snapshot or of its hashes file.
+
+        Returns:
+            dict: The snapshot, or None if there is no usable snapshot for
+            the current SQL query.
+        """
+        if not os.path.exists(snapshot_path):
+            return None
+        try:
+            snapshot = pd.read_pickle(snapshot_path)
+        except Exception as e:
+            self.logger.warning(f"Ignoring unreadable snapshot. Error: {e}")
+            return None
+        if snapshot.get('sql_query') != self.sql_query:
+            self.logger.info("SQL query changed since the last snapshot, reprocessing all rows.")
+            return None
+        return snapshot
+
+    def driving_table(self):
+        """
+        Returns the table whose rowids mark the rows added since the last
+        incremental run: the 'incremental_table' configuration parameter, or
+        else the first table named after FROM in the SQL query.
+        """
+        if self.incremental_table:
+            return self.incremental_table
+        tokens = self.sql_query.split()
+        upper = [token.upper() for token in tokens]
+        if 'FROM' not in upper or upper.index('FROM') + 1 == len(tokens):
+            raise ValueError("Set 'incremental_table', the SQL query names no table.")
+        return tokens[upper.index('FROM') + 1]
+
+    def read_watermark(self, table):
+        """
+        Reads the highest rowid of `table` and the 'Field_ID' stored in it.
+
+        Parameters:
+        - table (str): The driving table of the SQL query.
+
+        Returns:
+            dict: 'row_id' and 'Field_ID' of the last row, or a 'row_id' of 0
+            and a 'Field_ID' of None if the table is empty.
+        """
+        last = query_data(self.engine,
+                          f"SELECT rowid AS row_id, Field_ID FROM {table} "
+                          "ORDER BY rowid DESC LIMIT 1", allow_empty=True)
+        if last.empty:
+            return {'row_id': 0, 'Field_ID': None}
+        return {'row_id': int(last['row_id'].iloc[0]), 'Field_ID': int(last['Field_ID'].iloc[0])}
+
+    def watermark_holds(self, table, watermark):
+        """
+        Checks that the row at a stored watermark still holds the same field.
+        SQLite hands out the rowid after the highest one in use, so when the
+        last row is deleted and another inserted, the new row can reuse the
+        watermark rowid and would otherwise never be seen.
+
+        Parameters:
+        - table (str): The driving table of the SQL query.
+        - watermark (dict): The watermark stored by the last run.
+
+        Returns:
+            bool: True if rows above the watermark are exactly the new rows.
+        """
+        if watermark is None:
+            return False
+        if watermark['Field_ID'] is None:
+            return True
+        row = query_data(self.engine,
+                         f"SELECT Field_ID FROM {table} WHERE rowid = :row_id",
+                         params={'row_id': watermark['row_id']}, allow_empty=True)
+        return not row.empty and int(row['Field_ID'].iloc[0]) == watermark['Field_ID']
+
+    def process_incremental(self, snapshot_path=None, full_refresh=False):
+        """
+        Executes the data processing pipeline on new rows only.
+
+        The highest rowid of the query's driving table (see `driving_table`)
+        is kept as a watermark. Only fields whose rows in that table were
+        inserted after it are queried, renamed, corrected, mapped to weather
+        stations and upserted into the previous output, so new fields are
+        found whatever their 'Field_ID'. Per-row hashes are kept in a small
+        '<snapshot_path>.hashes' file next to the output frame, so a run
+        that finds no new rows reads the snapshot but writes nothing.
+
+        Rows that were updated in place or deleted are only picked up by a
+        full refresh, which queries every row, reprocesses the ones whose
+        hash changed and drops the ones no longer in the source. The first
+        run, any run after the SQL query changed and any run whose watermark
+        row was replaced is a full refresh. Changes to the weather mapping
+        CSV alone are not detected; delete the snapshot to force a full run.
+
+        Parameters:
+        - snapshot_path (str): Path of the snapshot file. Defaults to the
+        'snapshot_path' configuration parameter.
+        - full_refresh (bool): Compare every row with the stored hashes
+        instead of querying new rows only. Defaults to False.
+
+        Returns:
+            DataFrame: The processed rows that were new or changed in this run.
+        """
+        snapshot_path = snapshot_path or self.snapshot_path
+        if not snapshot_path:
+            raise ValueError("A snapshot_path is required for incremental processing.")
+        hashes_path = snapshot_path + '.hashes'
+
+        self.engine = get_db_engine(self.db_path, **self.engine_options)
+        table = self.driving_table()
+        stored = self.load_snapshot(hashes_path)
+        snapshot = self.load_snapshot(snapshot_path) if stored is not None else None
+        previous_df = snapshot['df'] if snapshot is not None else None
+        previous_hashes = stored['hashes'] if snapshot is not None else None
+        previous_watermark = stored.get('watermark') if snapshot is not None else None
+
+        # Read before the data, so rows inserted meanwhile are fetched again next run.
+        watermark = self.read_watermark(table)
+        compare_all = previous_df is None or full_refresh
+        if not compare_all and not self.watermark_holds(table, previous_watermark):
+            self.logger.info("No usable watermark, comparing all rows.")
+            compare_all = True
+
+        if compare_all:
+            raw_df = query_data(self.engine, self.sql_query)
+        else:
+            raw_df = query_data(self.engine,
+                                f"SELECT * FROM ({self.sql_query}) AS source "
+                                f"WHERE Field_ID IN (SELECT Field_ID FROM {table} "
+                                "WHERE rowid > :low AND rowid <= :high)",
+                                params={'low': previous_watermark['row_id'],
+                                        'high': watermark['row_id']},
+                                allow_empty=True)
+        hashes = pd.Series(pd.util.hash_pandas_object(raw_df, index=False).to_numpy(),
+                           index=raw_df['Field_ID'].to_numpy(), dtype='uint64')
+
+        if previous_df is None or not compare_all:
+            delta_df = raw_df
+        else:
+            changed = hashes.ne(previous_hashes.reindex(hashes.index)).to_numpy()
+            delta_df = raw_df[changed].reset_index(drop=True)
+        self.logger.info(f"{len(delta_df)} of {len(raw_df)} queried rows are new or changed.")
+        if not delta_df.empty:
+            self.df = delta_df
+            self.rename_columns()
+            self.apply_corrections()
+            self.weather_station_mapping()
+            delta_df = self.df
+
+        if previous_df is None:
+            self.df = delta_df
+        elif not compare_all:
+            # Upsert: a field can be deleted and inserted again with the same Field_ID.
+            hashes = pd.concat([previous_hashes[~previous_hashes.index.isin(hashes.index)],
+                                hashes])
+            if not delta_df.empty:
+                kept = previous_df[~previous_df['Field_ID'].isin(delta_df['Field_ID'])]
+                self.df = pd.concat([kept, delta_df], ignore_index=True)
+            else:
+                self.df = previous_df
+        else:
+            # Upsert the processed delta and drop rows no longer in the source.
+            kept = previous_df[previous_df['Field_ID'].isin(hashes.index)
+                               & ~previous_df['Field_ID'].isin(delta_df['Field_ID'])]
+            combined = pd.concat([kept, delta_df]) if not delta_df.empty else kept
+            self.df = (combined.set_index('Field_ID')
+                       .reindex(hashes.index)
+                       .rename_axis('Field_ID')
+                       .reset_index())
+        if self.optimize_memory:
+            self.optimize_dtypes()
+
+        frame_changed = previous_df is None or not delta_df.empty or \
+            not hashes.index.equals(previous_hashes.index)
+        if frame_changed:
+            pd.to_pickle({'sql_query': self.sql_query, 'df': self.df}, snapshot_path)
+        if frame_changed or watermark != previous_watermark:
+            pd.to_pickle({'sql_query': self.sql_query, 'hashes': hashes,
+                          'watermark': watermark}, hashes_path)
+        if not frame_changed:
+            self.logger.info("No new or changed rows, the snapshot is left as it is.")
+        return delta_df
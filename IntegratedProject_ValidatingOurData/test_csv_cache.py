@@ -0,0 +1,97 @@
+import json
+import os
+import time
+import pandas as pd
+import pytest
+from csv_cache import CSVCache
+
+
+def write_csv(path, rows, mtime=None):
+    pd.DataFrame({'Field_ID': range(rows), 'Value': range(rows)}).to_csv(path, index=False)
+    if mtime is not None:
+        os.utime(path, (mtime, mtime))
+
+
+def test_http_entry_is_revalidated_with_304(http_server, tmp_path):
+    write_csv(http_server['dir'] / 'data.csv', 3)
+    cache = CSVCache(str(tmp_path / 'cache'))
+    URL = http_server['url'] + '/data.csv'
+
+    first = cache.read_csv(URL)
+    second = cache.read_csv(URL)
+
+    assert http_server['codes'] == [200, 304], "The second read should be a conditional GET."
+    pd.testing.assert_frame_equal(first, second)
+
+
+def test_modified_http_file_is_fetched_again(http_server, tmp_path):
+    path = http_server['dir'] / 'data.csv'
+    write_csv(path, 3, mtime=time.time() - 3600)
+    cache = CSVCache(str(tmp_path / 'cache'))
+    URL = http_server['url'] + '/data.csv'
+
+    cache.read_csv(URL)
+    write_csv(path, 5)
+
+    assert len(cache.read_csv(URL)) == 5
+    assert http_server['codes'] == [200, 200]
+
+
+def test_local_file_is_reread_when_it_changes(tmp_path):
+    path = tmp_path / 'data.csv'
+    write_csv(path, 3, mtime=time.time() - 3600)
+    cache = CSVCache(str(tmp_path / 'cache'))
+
+    assert len(cache.read_csv(str(path))) == 3
+    write_csv(path, 4)
+    assert len(cache.read_csv(str(path))) == 4
+
+
+def entry_size(tmp_path):
+    """
+    Returns the size of one cached entry of a 3-row CSV.
+    """
+    write_csv(tmp_path / 'probe.csv', 3)
+    probe = CSVCache(str(tmp_path / 'probe_cache'))
+    probe.read_csv(str(tmp_path / 'probe.csv'))
+    return next(iter(probe.index.values()))['size']
+
+
+def test_least_recently_used_entry_is_evicted(tmp_path):
+    for name in 'abc':
+        write_csv(tmp_path / f'{name}.csv', 3)
+    cache = CSVCache(str(tmp_path / 'cache'), max_bytes=2 * entry_size(tmp_path) + 10)
+
+    cache.read_csv(str(tmp_path / 'a.csv'))
+    cache.read_csv(str(tmp_path / 'b.csv'))
+    cache.read_csv(str(tmp_path / 'a.csv'))  # a is now more recent than b
+    cache.read_csv(str(tmp_path / 'c.csv'))
+
+    cached_urls = {entry['url'] for entry in cache.index.values()}
+    assert cached_urls == {str(tmp_path / 'a.csv'), str(tmp_path / 'c.csv')}
+    pkl_files = [name for name in os.listdir(cache.cache_dir) if name.endswith('.pkl')]
+    assert len(pkl_files) == 2
+
+
+def test_instances_sharing_a_directory_keep_each_others_entries(tmp_path):
+    write_csv(tmp_path / 'a.csv', 3)
+    write_csv(tmp_path / 'b.csv', 3)
+    first = CSVCache(str(tmp_path / 'cache'))
+    second = CSVCache(str(tmp_path / 'cache'))
+
+    first.read_csv(str(tmp_path / 'a.csv'))
+    second.read_csv(str(tmp_path / 'b.csv'))
+
+    with open(first.index_path) as f:
+        assert len(json.load(f)) == 2
+
+
+def test_untracked_entry_files_are_evicted(tmp_path):
+    cache = CSVCache(str(tmp_path / 'cache'), max_bytes=10)
+    stray = os.path.join(cache.cache_dir, 'f' * 64 + '.pkl')
+    with open(stray, 'wb') as f:
+        f.write(b'left behind')
+
+    cache.evict()
+
+    assert not os.path.exists(stray)
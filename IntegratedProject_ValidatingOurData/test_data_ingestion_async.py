@@ -0,0 +1,76 @@
+import asyncio
+import threading
+import time
+import urllib.error
+import pandas as pd
+import pytest
+from data_ingestion import _call_async, read_csv_async
+
+
+def write_csv(path):
+    pd.DataFrame({'Field_ID': [1, 2], 'Weather_station': [10, 20]}).to_csv(path, index=False)
+
+
+def test_read_csv_async_reads_from_server(http_server):
+    write_csv(http_server['dir'] / 'data.csv')
+
+    df = asyncio.run(read_csv_async(http_server['url'] + '/data.csv'))
+
+    assert list(df['Weather_station']) == [10, 20]
+
+
+def test_read_csv_async_times_out_after_retries(http_server):
+    write_csv(http_server['dir'] / 'data.csv')
+
+    with pytest.raises(asyncio.TimeoutError):
+        asyncio.run(read_csv_async(http_server['url'] + '/slow/data.csv',
+                                   timeout=0.2, retries=1, backoff=0.01))
+
+    assert len(http_server['requests']) == 2, "One attempt and one retry are expected."
+
+
+def test_http_errors_are_not_retried(http_server):
+    with pytest.raises(urllib.error.HTTPError):
+        asyncio.run(read_csv_async(http_server['url'] + '/missing.csv',
+                                   retries=2, backoff=0.01))
+
+    assert http_server['codes'] == [404]
+
+
+def test_connection_errors_are_retried():
+    attempts = []
+
+    def flaky():
+        attempts.append(1)
+        if len(attempts) < 3:
+            raise ConnectionResetError()
+        return 'done'
+
+    assert asyncio.run(_call_async(flaky, retries=2, backoff=0.01)) == 'done'
+    assert len(attempts) == 3
+
+
+def test_timed_out_calls_keep_their_semaphore_slot():
+    running = []
+    peak = []
+    lock = threading.Lock()
+
+    def slow():
+        with lock:
+            running.append(1)
+            peak.append(len(running))
+        time.sleep(0.3)
+        with lock:
+            running.pop()
+
+    async def main():
+        semaphore = asyncio.Semaphore(2)
+        return await asyncio.gather(
+            *[_call_async(slow, semaphore=semaphore, timeout=0.05, retries=2, backoff=0.01)
+              for i in range(4)],
+            return_exceptions=True)
+
+    results = asyncio.run(main())
+
+    assert all(isinstance(r, asyncio.TimeoutError) for r in results)
+    assert max(peak) <= 2, "Timed-out worker threads must count against the semaphore."
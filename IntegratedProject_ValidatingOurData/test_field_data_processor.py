@@ -0,0 +1,188 @@
+import os
+import shutil
+import sqlite3
+import pandas as pd
+import pytest
+from data_ingestion import dispose_engines, get_db_engine, query_data, \
+    query_tables_parallel
+from field_data_processor import FieldDataProcessor
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+TABLES = ['geographic_features', 'weather_features', 'soil_and_crop_features',
+          'farm_management_features']
+
+
+@pytest.fixture
+def config_params(tmp_path):
+    """
+    Configuration for a copy of the survey database, so tests can edit it.
+    """
+    db_file = tmp_path / 'survey.db'
+    shutil.copy(os.path.join(HERE, 'Maji_Ndogo_farm_survey_small.db'), db_file)
+    yield {
+        'sql_query': """
+        SELECT *
+        FROM geographic_features
+        LEFT JOIN weather_features USING (Field_ID)
+        LEFT JOIN soil_and_crop_features USING (Field_ID)
+        LEFT JOIN farm_management_features USING (Field_ID)
+        """,
+        'db_path': f'sqlite:///{db_file}',
+        'columns_to_rename': {'Annual_yield': 'Crop_type', 'Crop_type': 'Annual_yield'},
+        'values_to_rename': {'cassaval': 'cassava', 'wheatn': 'wheat', 'teaa': 'tea'},
+        'weather_mapping_csv': os.path.join(HERE, 'Weather_data_field_mapping.csv'),
+        'snapshot_path': str(tmp_path / 'snapshot.pkl'),
+    }
+    dispose_engines()
+
+
+def processed(config_params):
+    processor = FieldDataProcessor(config_params, logging_level='NONE')
+    processor.process()
+    return processor.df
+
+
+def incremental(config_params, **kwargs):
+    processor = FieldDataProcessor(config_params, logging_level='NONE')
+    delta = processor.process_incremental(**kwargs)
+    return processor.df, delta
+
+
+def database(config_params):
+    return sqlite3.connect(config_params['db_path'][len('sqlite:///'):])
+
+
+def remove_field(config_params, field_id):
+    """
+    Deletes a field from every table and returns its rows, to insert again.
+    """
+    with database(config_params) as connection:
+        rows = {table: connection.execute(f"SELECT * FROM {table} WHERE Field_ID = ?",
+                                          (field_id,)).fetchall()
+                for table in TABLES}
+        for table in TABLES:
+            connection.execute(f"DELETE FROM {table} WHERE Field_ID = ?", (field_id,))
+    return rows
+
+
+def insert_rows(config_params, rows):
+    with database(config_params) as connection:
+        for table, table_rows in rows.items():
+            for row in table_rows:
+                placeholders = ', '.join('?' * len(row))
+                connection.execute(f"INSERT INTO {table} VALUES ({placeholders})", row)
+
+
+def test_new_field_with_a_low_field_id_is_picked_up(config_params):
+    # Field 5754 is stored in rowid 4, far below the highest Field_ID.
+    rows = remove_field(config_params, 5754)
+    incremental(config_params)
+
+    insert_rows(config_params, rows)
+    df, delta = incremental(config_params)
+
+    assert list(delta['Field_ID']) == [5754]
+    pd.testing.assert_frame_equal(df, processed(config_params))
+
+
+def test_deleted_and_reinserted_field_is_not_duplicated(config_params):
+    incremental(config_params)
+    rows = remove_field(config_params, 5754)
+    incremental(config_params)
+
+    insert_rows(config_params, rows)
+    df, delta = incremental(config_params)
+
+    assert len(delta) == 1
+    pd.testing.assert_frame_equal(df, processed(config_params))
+
+
+def test_replaced_last_row_is_picked_up(config_params):
+    incremental(config_params)
+    with database(config_params) as connection:
+        last_id, = connection.execute("SELECT Field_ID FROM geographic_features "
+                                      "ORDER BY rowid DESC LIMIT 1").fetchone()
+    remove_field(config_params, last_id)
+    # The new field reuses the rowid of the deleted last row.
+    insert_rows(config_params, remove_field(config_params, 5754))
+
+    df, delta = incremental(config_params)
+
+    pd.testing.assert_frame_equal(df, processed(config_params))
+
+
+def test_unchanged_run_writes_nothing(config_params):
+    incremental(config_params)
+    paths = [config_params['snapshot_path'], config_params['snapshot_path'] + '.hashes']
+    mtimes = [os.stat(path).st_mtime_ns for path in paths]
+
+    df, delta = incremental(config_params)
+
+    assert delta.empty
+    assert [os.stat(path).st_mtime_ns for path in paths] == mtimes
+    pd.testing.assert_frame_equal(df, processed(config_params))
+
+
+def test_full_refresh_picks_up_updates_and_deletions(config_params):
+    incremental(config_params)
+    remove_field(config_params, 5754)
+    with database(config_params) as connection:
+        connection.execute("UPDATE geographic_features SET Elevation = 1 WHERE Field_ID = 40734")
+
+    df, delta = incremental(config_params, full_refresh=True)
+
+    assert list(delta['Field_ID']) == [40734]
+    pd.testing.assert_frame_equal(df, processed(config_params))
+
+
+def move_field_to_station(path, field_id, station):
+    mapping = pd.read_csv(path)
+    mapping.loc[mapping['Field_ID'] == field_id, 'Weather_station'] = station
+    mapping.to_csv(path, index=False)
+
+
+def station_of(df, field_id):
+    return df.loc[df['Field_ID'] == field_id, 'Weather_station'].item()
+
+
+def test_edited_mapping_csv_is_read_again(config_params, tmp_path):
+    mapping_csv = tmp_path / 'mapping.csv'
+    shutil.copy(config_params['weather_mapping_csv'], mapping_csv)
+    config_params['weather_mapping_csv'] = str(mapping_csv)
+    assert station_of(processed(config_params), 40734) != 99
+
+    move_field_to_station(mapping_csv, 40734, 99)
+
+    assert station_of(processed(config_params), 40734) == 99
+
+
+def test_mapping_url_is_revalidated_through_the_cache(config_params, http_server, tmp_path):
+    mapping_csv = http_server['dir'] / 'mapping.csv'
+    shutil.copy(config_params['weather_mapping_csv'], mapping_csv)
+    os.utime(mapping_csv, (0, 0))
+    config_params['weather_mapping_csv'] = http_server['url'] + '/mapping.csv'
+    config_params['csv_cache_dir'] = str(tmp_path / 'cache')
+    processed(config_params)
+    assert station_of(processed(config_params), 40734) != 99
+
+    move_field_to_station(mapping_csv, 40734, 99)
+
+    assert station_of(processed(config_params), 40734) == 99
+    assert http_server['codes'] == [200, 304, 200]
+
+
+def test_parallel_table_reads_match_the_sql_join(config_params):
+    # A field missing from a joined table must come back with NaNs, as with LEFT JOIN.
+    with database(config_params) as connection:
+        connection.execute("DELETE FROM weather_features WHERE Field_ID = 5754")
+    engine = get_db_engine(config_params['db_path'])
+    tables = {table: None for table in TABLES}
+
+    df, timings = query_tables_parallel(engine, tables)
+
+    pd.testing.assert_frame_equal(df, query_data(engine, config_params['sql_query']))
+    assert set(timings) == set(TABLES)
+
+    config_params['sql_tables'] = tables
+    pd.testing.assert_frame_equal(processed(config_params),
+                                  processed(dict(config_params, sql_tables=None)))
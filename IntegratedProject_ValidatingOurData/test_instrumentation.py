@@ -0,0 +1,15 @@
+import resource
+import numpy as np
+from instrumentation import PipelineMetrics
+
+
+def test_stages_leave_the_process_peak_rss_alone():
+    np.ones(10_000_000)  # Raise the process peak well above the stage
+    before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    metrics = PipelineMetrics('field')
+
+    with metrics.stage('ingest') as stage:
+        stage.rows_out = 0
+
+    assert resource.getrusage(resource.RUSAGE_SELF).ru_maxrss >= before
+    assert metrics.records[0].rss_delta_bytes is not None
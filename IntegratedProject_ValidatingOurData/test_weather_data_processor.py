@@ -0,0 +1,66 @@
+import pandas as pd
+import pytest
+from benchmark_pipeline import REGEX_PATTERNS, generate_weather_csv
+from weather_data_processor import WeatherDataProcessor
+
+# Messages no pattern matches, and messages several patterns match, where the
+# first pattern in REGEX_PATTERNS must win.
+EXTRA_MESSAGES = [
+    'Sensor offline',
+    'Calibration in progress: no reading',
+    'Rainfall 12.5 mm, pollution index = 3',
+    'Temperature = 21C',
+]
+
+
+@pytest.fixture
+def weather_csv(tmp_path):
+    path = tmp_path / 'weather.csv'
+    generate_weather_csv(path, 2000, seed=1)
+    extra = pd.DataFrame({'Weather_station_ID': range(len(EXTRA_MESSAGES)),
+                          'Message': EXTRA_MESSAGES})
+    extra.to_csv(path, mode='a', index=False, header=False)
+    return str(path)
+
+
+def loaded_processor(weather_csv):
+    processor = WeatherDataProcessor({'weather_csv_path': weather_csv,
+                                      'regex_patterns': REGEX_PATTERNS},
+                                     logging_level='NONE')
+    processor.weather_station_mapping()
+    return processor
+
+
+def test_vectorized_extraction_matches_row_wise(weather_csv):
+    vectorized = loaded_processor(weather_csv).process_messages()
+    row_wise = loaded_processor(weather_csv).process_messages(vectorized=False)
+
+    pd.testing.assert_frame_equal(vectorized, row_wise)
+    tail = vectorized.tail(len(EXTRA_MESSAGES))
+    assert tail['Measurement'].isna().tolist()[:2] == [True, True]
+    assert tail['Value'].isna().tolist()[:2] == [True, True]
+    assert tail['Measurement'].tolist()[2:] == ['Rainfall', 'Temperature']
+
+
+def serial_means(weather_csv):
+    processor = loaded_processor(weather_csv)
+    processor.process_messages()
+    return processor.calculate_means()
+
+
+def test_parallel_means_of_a_local_file_match_calculate_means(weather_csv):
+    processor = loaded_processor(weather_csv)
+    # Small byte ranges, so most range boundaries fall inside a line.
+    means = processor.calculate_means_parallel(max_workers=2, chunk_bytes=4096)
+
+    pd.testing.assert_frame_equal(means, serial_means(weather_csv), check_exact=False)
+
+
+def test_parallel_means_of_a_url_match_calculate_means(weather_csv, http_server):
+    url = http_server['url'] + '/weather.csv'
+    processor = WeatherDataProcessor({'weather_csv_path': url,
+                                      'regex_patterns': REGEX_PATTERNS},
+                                     logging_level='NONE')
+    means = processor.calculate_means_parallel(max_workers=2, chunk_rows=300)
+
+    pd.testing.assert_frame_equal(means, serial_means(weather_csv), check_exact=False)
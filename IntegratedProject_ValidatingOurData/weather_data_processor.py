@@ -1,8 +1,15 @@
+import io
+import os
 import re
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
 import numpy as np
 import pandas as pd
 import logging
-from data_ingestion import read_from_web_CSV
+from data_ingestion import read_columnar, read_csv_async, read_from_web_CSV, \
+    write_columnar
+from csv_cache import cache_from_config
+from data_validation import DataValidator, WEATHER_DATA_RULES
+from instrumentation import metrics_from_config
 
 
 class WeatherDataProcessor:
@@ -18,10 +25,22 @@ class WeatherDataProcessor:
         - weather_station_data (str): URL path to the weather station data.
         - patterns (dict): Dictionary containing regex patterns for
         measurement extraction.
+        - compiled_patterns (dict): The same patterns, compiled once.
+        - csv_cache (CSVCache): Optional on-disk cache for the weather CSV,
+        configured with 'csv_cache_dir'.
+        - validation_rules (list): Rules checked by `validate`.
+        - metrics: Per-stage timings and memory, recorded when
+        'collect_metrics' is set in config_params.
         - weather_df (DataFrame): DataFrame to store weather data.
         """
         self.weather_station_data = config_params['weather_csv_path']
         self.patterns = config_params['regex_patterns']
+        self.compiled_patterns = {key: re.compile(pattern)
+                                  for key, pattern in self.patterns.items()}
+        self.csv_cache = cache_from_config(config_params)
+        self.validation_rules = config_params.get('validation_rules',
+                                                  WEATHER_DATA_RULES)
+        self.metrics = metrics_from_config(config_params, 'weather')
         self.weather_df = None
         self.initialize_logging(logging_level)
 
@@ -65,7 +84,8 @@ class WeatherDataProcessor:
         Returns:
         - None
         """
-        self.weather_df = pd.read_csv(self.weather_station_data)
+        self.weather_df = read_from_web_CSV(self.weather_station_data,
+                                            self.csv_cache)
         self.logger.info("Successfully loaded weather \
             station data from the web.")
 
@@ -79,8 +99,8 @@ class WeatherDataProcessor:
         Returns:
         - tuple: Measurement type and extracted value.
         """
-        for key, pattern in self.patterns.items():
-            match = re.search(pattern, message)
+        for key, pattern in self.compiled_patterns.items():
+            match = pattern.search(message)
             if match:
                 self.logger.debug(f"Measurement extracted: {key}")
                 return key, float(next((x for x in match.groups()
@@ -88,17 +108,63 @@ class WeatherDataProcessor:
         self.logger.debug("No measurement match found.")
         return None, None
 
-    def process_messages(self):
+    def extract_measurements(self, messages):
+        """
+        Extracts measurement types and values from a Series of messages.
+
+        Vectorized equivalent of `extract_measurement`: the patterns are
+        tried in order with `Series.str.extract`, each one only against the
+        messages that no earlier pattern matched, so the first matching
+        pattern wins exactly as in the row-wise version.
+
+        Parameters:
+        - messages (Series): Messages containing measurement information.
+
+        Returns:
+        - DataFrame: 'Measurement' and 'Value' columns aligned with messages.
+        """
+        measurement = pd.Series(None, index=messages.index, dtype=object)
+        value = pd.Series(np.nan, index=messages.index, dtype=float)
+        remaining = messages
+        for key, pattern in self.compiled_patterns.items():
+            if remaining.empty:
+                break
+            groups = remaining.str.extract(pattern, expand=True)
+            # The value is the first group that took part in the match.
+            first = groups[0]
+            for column in groups.columns[1:]:
+                first = first.fillna(groups[column])
+            matched = first.notna()
+            measurement[first.index[matched]] = key
+            value[first.index[matched]] = first[matched].astype(float)
+            remaining = remaining[~matched]
+            self.logger.debug(f"Measurement extracted: {key} "
+                              f"({int(matched.sum())} messages)")
+        return pd.DataFrame({'Measurement': measurement.infer_objects(),
+                             'Value': value})
+
+    def process_messages(self, vectorized=True):
         """
         Processes messages to extract measurements and updates weather_df.
 
+        Parameters:
+        - vectorized (bool): Use the column-wise `extract_measurements` path.
+        When False, `extract_measurement` is applied to every message.
+        Defaults to True.
+
         Returns:
         - DataFrame: Processed weather data.
         """
         if self.weather_df is not None:
-            result = self.weather_df['Message'].apply(self.extract_measurement)
-            self.weather_df['Measurement'], \
-                self.weather_df['Value'] = zip(*result)
+            if vectorized:
+                result = self.extract_measurements(self.weather_df['Message'])
+                self.weather_df['Measurement'] = result['Measurement']
+                self.weather_df['Value'] = result['Value']
+            else:
+                result = self.weather_df['Message'].apply(
+                    self.extract_measurement)
+                self.weather_df['Measurement'], \
+                    self.weather_df['Value'] = zip(*result)
             self.logger.info("Messages processed and measurements extracted.")
         else:
             self.logger.warning("weather_df is not initialized, \
@@ -113,15 +179,159 @@ class WeatherDataProcessor:
         - DataFrame: Mean values of measurements.
         """
         if self.weather_df is not None:
-            means = self.weather_df.groupby(by=['Weather_station_ID',
-                                                'Measurement'])['Value'].mean()
+            with self.metrics.stage('means', len(self.weather_df)) as stage:
+                means = self.weather_df.groupby(by=['Weather_station_ID',
+                                                    'Measurement'])['Value'].mean()
+                means = means.unstack()
+                stage.rows_out = len(means)
             self.logger.info("Mean values calculated.")
-            return means.unstack()
+            return means
         else:
             self.logger.warning("weather_df is not initialized, \
                 cannot calculate means.")
             return None
 
+    def calculate_means_parallel(self, max_workers=None,
+                                 chunk_bytes=64 * 1024 * 1024,
+                                 chunk_rows=500000):
+        """
+        Calculates the same means as `calculate_means`, reading and parsing
+        the weather CSV in parallel worker processes.
+
+        A local CSV is split into byte ranges that each worker reads and
+        parses on its own; any other source is read here in row chunks that
+        are handed to the workers. Every worker extracts the measurements of
+        its chunk and returns the sum and count per Weather_station_ID and
+        Measurement, which are then combined into the means. Only the
+        partial aggregates are kept in memory, and `weather_df` is not set.
+        The means match the serial path up to floating-point rounding.
+
+        Parameters:
+        - max_workers (int): Number of worker processes. Defaults to the
+        number of CPUs.
+        - chunk_bytes (int): Size of the byte ranges of a local CSV.
+        Defaults to 64 MiB.
+        - chunk_rows (int): Rows per chunk for other sources.
+        Defaults to 500000.
+
+        Returns:
+        - DataFrame: Mean values of measurements.
+        """
+        max_workers = max_workers or os.cpu_count() or 1
+        partials = []
+        with ProcessPoolExecutor(max_workers=max_workers) as pool:
+            if os.path.isfile(self.weather_station_data):
+                size = os.path.getsize(self.weather_station_data)
+                futures = [pool.submit(_aggregate_byte_range,
+                                       self.weather_station_data, start,
+                                       min(start + chunk_bytes, size),
+                                       self.patterns)
+                           for start in range(0, size, chunk_bytes)]
+                partials = [future.result() for future in futures]
+            else:
+                # Keep a bounded number of chunks in flight so memory stays
+                # proportional to the number of workers.
+                pending = set()
+                for chunk in pd.read_csv(self.weather_station_data,
+                                         chunksize=chunk_rows):
+                    if len(pending) >= 2 * max_workers:
+                        done, pending = wait(pending,
+                                             return_when=FIRST_COMPLETED)
+                        partials.extend(future.result() for future in done)
+                    pending.add(pool.submit(_aggregate_chunk, chunk,
+                                            self.patterns))
+                partials.extend(future.result() for future in pending)
+        # Empty chunks carry no dtype information, so leave them out.
+        non_empty = [partial for partial in partials if not partial.empty]
+        totals = pd.concat(non_empty or partials).groupby(level=[0, 1]).sum()
+        means = (totals['sum'] / totals['count']).rename('Value')
+        self.logger.info(f"Mean values calculated from {len(partials)} chunks.")
+        return means.unstack()
+
+    def calculate_stats_streaming(self, chunksize=100000):
+        """
+        Calculates per-station measurement statistics in a single streaming
+        pass over the weather CSV.
+
+        The CSV is read `chunksize` rows at a time. The count, mean, sum of
+        squared deviations (M2), min and max of each chunk are merged into
+        running totals with the parallel form of Welford's algorithm, so
+        memory depends on the number of stations and measurement types, not
+        on the number of messages. `weather_df` is not set.
+
+        Parameters:
+        - chunksize (int): Rows read per chunk. Defaults to 100000.
+
+        Returns:
+        - DataFrame: 'count', 'mean', 'variance' (sample variance), 'min' and
+        'max' indexed by Weather_station_ID and Measurement. The means equal
+        `calculate_means().stack()` up to floating-point rounding.
+        """
+        stats = None
+        for chunk in pd.read_csv(self.weather_station_data,
+                                 chunksize=chunksize):
+            extracted = self.extract_measurements(chunk['Message'])
+            extracted['Weather_station_ID'] = chunk['Weather_station_ID']
+            extracted = extracted.dropna(subset=['Measurement', 'Value'])
+            grouped = extracted.groupby(['Weather_station_ID',
+                                         'Measurement'])['Value']
+            chunk_stats = grouped.agg(['count', 'mean', 'min', 'max'])
+            chunk_stats['M2'] = grouped.var(ddof=0) * chunk_stats['count']
+            stats = chunk_stats if stats is None \
+                else _combine_stats(stats, chunk_stats)
+        if stats is None:
+            self.logger.warning("No weather data found, cannot calculate statistics.")
+            return None
+        stats['variance'] = (stats['M2'] / (stats['count'] - 1)) \
+            .where(stats['count'] > 1)
+        self.logger.info("Streaming statistics calculated.")
+        return stats[['count', 'mean', 'variance', 'min', 'max']].sort_index()
+
+    def validate(self, rules=None):
+        """
+        Checks the processed weather data against a rule set in-process.
+
+        Parameters:
+        - rules (list): Rules as accepted by `DataValidator`. Defaults to the
+        'validation_rules' configuration parameter, or WEATHER_DATA_RULES.
+
+        Returns:
+            dict: The validation report, see `DataValidator.validate`.
+        """
+        validator = DataValidator(rules or self.validation_rules, id_column='Weather_station_ID')
+        report = validator.validate(self.weather_df)
+        if validator.passed(report):
+            self.logger.info("All validation rules passed.")
+        else:
+            failed = [name for name, result in report.items() if result['violations']]
+            self.logger.warning(f"Validation rules failed: {failed}")
+        return report
+
+    def export_data(self, path):
+        """
+        Writes the processed weather data to a columnar file.
+
+        Parameters:
+        - path (str): Destination path. A '.parquet' extension writes
+        Parquet and '.feather' or '.arrow' writes Arrow IPC.
+        """
+        write_columnar(self.weather_df, path)
+
+    def import_data(self, path, columns=None, memory_map=True):
+        """
+        Loads weather data written by `export_data` into `weather_df`.
+
+        Parameters:
+        - path (str): Path of the columnar file.
+        - columns (list): Optional subset of columns to load.
+        - memory_map (bool): Memory-map the file. Defaults to True.
+
+        Returns:
+            DataFrame: The loaded data.
+        """
+        self.weather_df = read_columnar(path, columns, memory_map)
+        return self.weather_df
+
     def process(self):
         """
         Executes data processing steps.
@@ -129,6 +339,97 @@ class WeatherDataProcessor:
         Returns:
         - None
         """
-        self.weather_station_mapping()
+        with self.metrics.stage('ingest') as stage:
+            self.weather_station_mapping()
+            stage.rows_out = len(self.weather_df)
+        with self.metrics.stage('message_extraction',
+                                len(self.weather_df)) as stage:
+            self.process_messages()
+            stage.rows_out = int(self.weather_df['Measurement'].notna().sum())
+        self.logger.info("Data processing completed.")
+
+
+    async def process_async(self, semaphore=None, timeout=None, retries=2):
+        """
+        Executes data processing steps without blocking the event loop.
+
+        The weather CSV is read in a worker thread, so many processors can
+        fetch their feeds concurrently.
+
+        Parameters:
+        - semaphore (asyncio.Semaphore): Optional semaphore shared between
+        processors to bound how many feeds are read at once.
+        - timeout (float): Seconds to wait for each read attempt.
+        - retries (int): Number of retries after a failed read. Defaults to 2.
+
+        Returns:
+        - DataFrame: Processed weather data.
+        """
+        self.weather_df = await read_csv_async(self.weather_station_data,
+                                               self.csv_cache, semaphore,
+                                               timeout, retries)
+        self.logger.info("Successfully loaded weather \
+            station data from the web.")
         self.process_messages()
         self.logger.info("Data processing completed.")
+        return self.weather_df
+
+
+def _combine_stats(a, b):
+    """
+    Merges two frames of running count/mean/M2/min/max statistics
+    (Chan et al.'s pairwise update of Welford's algorithm).
+    """
+    index = a.index.union(b.index)
+    a = a.reindex(index)
+    b = b.reindex(index)
+    count_a = a['count'].fillna(0)
+    count_b = b['count'].fillna(0)
+    count = count_a + count_b
+    delta = b['mean'].fillna(0) - a['mean'].fillna(0)
+    combined = pd.DataFrame(index=index)
+    combined['count'] = count.astype(np.int64)
+    combined['mean'] = a['mean'].fillna(0) + delta * count_b / count
+    # Groups seen on one side only keep that side's mean exactly.
+    combined['mean'] = combined['mean'].where(count_a > 0, b['mean'])
+    combined['M2'] = a['M2'].fillna(0) + b['M2'].fillna(0) \
+        + delta ** 2 * count_a * count_b / count
+    combined['min'] = np.fmin(a['min'], b['min'])
+    combined['max'] = np.fmax(a['max'], b['max'])
+    return combined
+
+
+def _aggregate_chunk(chunk, patterns):
+    """
+    Extracts the measurements of a chunk of weather data and returns their
+    sum and count per Weather_station_ID and Measurement.
+    """
+    processor = WeatherDataProcessor({'weather_csv_path': None,
+                                      'regex_patterns': patterns}, "NONE")
+    extracted = processor.extract_measurements(chunk['Message'])
+    extracted['Weather_station_ID'] = chunk['Weather_station_ID']
+    return extracted.groupby(['Weather_station_ID', 'Measurement'])['Value'] \
+        .agg(['sum', 'count'])
+
+
+def _aggregate_byte_range(path, start, end, patterns):
+    """
+    Reads the rows of a CSV file that start within [start, end) bytes and
+    aggregates them with `_aggregate_chunk`.
+    """
+    with open(path, 'rb') as f:
+        header = f.readline()
+        if start <= len(header):
+            f.seek(len(header))
+        else:
+            # Skip the line straddling the start; it belongs to the previous range.
+            f.seek(start - 1)
+            f.readline()
+        position = f.tell()
+        data = f.read(max(end - position, 0))
+        if data and not data.endswith(b'\n'):
+            data += f.readline()
+    if not data.strip():
+        return _aggregate_chunk(pd.DataFrame({'Weather_station_ID': [],
+                                              'Message': []}), patterns)
+    return _aggregate_chunk(pd.read_csv(io.BytesIO(header + data)), patterns)
@@ -4,17 +4,31 @@
 #                                      SEARCHING ALGORITHMS
 #=================================================================================================
 def binary_search(items, target):
-    mid = len(items) // 2
-    if len(items) == 1:
-        return mid if items[mid] == target else False
-    elif items[mid] == target:
-        return mid
-    else:
+    """ Iterative binary search over a sorted list.
+        Returns the index of the first occurrence of target, or None if it is absent. """
+    lo, hi = 0, len(items)
+    while lo < hi:
+        mid = (lo + hi) // 2
         if items[mid] < target:
-            callback_response = binary_search(items[mid:], target)
-            return mid + callback_response if callback_response is not False else False
+            lo = mid + 1
         else:
-            return binary_search(items[:mid], target)
+            hi = mid
+    if lo < len(items) and items[lo] == target:
+        return lo
+    return None
+
+def binary_search_many(items, targets):
+    """ Batched binary search of many targets in one sorted array, using numpy.searchsorted.
+        Returns a numpy array holding, for each target, the index of its first occurrence
+        in items, or -1 if it is absent. """
+    import numpy as np
+    items = np.asarray(items)
+    targets = np.asarray(targets)
+    indices = np.searchsorted(items, targets, side='left')
+    if len(items) == 0:
+        return np.full(targets.shape, -1, dtype=np.intp)
+    found = (indices < len(items)) & (items[np.minimum(indices, len(items) - 1)] == targets)
+    return np.where(found, indices, -1)
 
 def linear_search(items,target):
     for i in range(len(items)):
@@ -44,57 +58,317 @@ def insertion_sort(lst):
         i=i+1
     return lst
 
+MERGE_SORT_CUTOFF = 16  # Runs shorter than this are insertion sorted by merge_sort
+
 def merge(A, B):  
-    """ The merge function used in merge sort """
+    """ The merge function used in merge sort.
+        Merges two sorted lists by index in linear time; on ties the element of A
+        comes first, so the merge is stable. A and B are left unchanged. """
     new_list = []
-    while len(A) > 0 and len(B) > 0:
-        if A[0] < B[0]:
-            new_list.append(A[0])
-            A.pop(0)
+    i, j = 0, 0
+    len_a, len_b = len(A), len(B)
+    while i < len_a and j < len_b:
+        if B[j] < A[i]:
+            new_list.append(B[j])
+            j += 1
         else:
-            new_list.append(B[0])
-            B.pop(0)
-    
-    if len(A) == 0:
-        new_list = new_list + B    
-    if len(B) == 0:
-        new_list = new_list + A
-        
-    return new_list        
-            
-def merge_sort(items):
-    """ Implementation of merge sort """
+            new_list.append(A[i])
+            i += 1
+    new_list.extend(A[i:])
+    new_list.extend(B[j:])
+    return new_list
 
+def _insertion_sort_run(keys, values, lo, hi):
+    """ Stable insertion sort of keys[lo:hi] in place, moving values alongside.
+        values may be the keys list itself. """
+    for i in range(lo + 1, hi):
+        k, v = keys[i], values[i]
+        j = i - 1
+        while j >= lo and keys[j] > k:
+            keys[j+1] = keys[j]
+            values[j+1] = values[j]
+            j -= 1
+        keys[j+1] = k
+        values[j+1] = v
+
+def _merge_runs(src_keys, src_values, dst_keys, dst_values, lo, mid, hi):
+    """ Stable merge of the sorted runs src[lo:mid] and src[mid:hi] into dst[lo:hi]. """
+    i, j = lo, mid
+    for k in range(lo, hi):
+        if i < mid and (j >= hi or not src_keys[j] < src_keys[i]):
+            dst_keys[k] = src_keys[i]
+            dst_values[k] = src_values[i]
+            i += 1
+        else:
+            dst_keys[k] = src_keys[j]
+            dst_values[k] = src_values[j]
+            j += 1
+
+def merge_sort(items, key=None):
+    """ Implementation of merge sort.
+        Bottom-up and stable: runs of MERGE_SORT_CUTOFF items are insertion sorted,
+        then merged pairwise by index, ping-ponging between the working list and a
+        single preallocated auxiliary buffer. Returns a new sorted list. """
     len_i = len(items)
-    if len_i == 1:
-        return items       
-        
-    mid_point = int(len_i / 2)
-    i1 = merge_sort(items[:mid_point])
-    i2 = merge_sort(items[mid_point:])       
-    
-    return merge(i1, i2)
-
-def quick_sort(items, index=-1):
-    """ Implementation of quick sort """
+    keys = list(items) if key is None else [key(x) for x in items]
+    # Without a key the values are the keys, so each move is a plain list write.
+    values = keys if key is None else list(items)
+
+    for lo in range(0, len_i, MERGE_SORT_CUTOFF):
+        _insertion_sort_run(keys, values, lo, min(lo + MERGE_SORT_CUTOFF, len_i))
+
+    aux_keys = [None] * len_i if len_i > MERGE_SORT_CUTOFF else []
+    aux_values = aux_keys if key is None else [None] * len(aux_keys)
+    src_keys, src_values, dst_keys, dst_values = keys, values, aux_keys, aux_values
+    width = MERGE_SORT_CUTOFF
+    while width < len_i:
+        for lo in range(0, len_i, 2 * width):
+            mid = min(lo + width, len_i)
+            hi = min(lo + 2 * width, len_i)
+            _merge_runs(src_keys, src_values, dst_keys, dst_values, lo, mid, hi)
+        src_keys, dst_keys = dst_keys, src_keys
+        src_values, dst_values = dst_values, src_values
+        width *= 2
+    return src_values
+
+def merge_sorted_runs(runs, key=None):
+    """ k-way merge of already sorted iterables (e.g. partitions sorted in parallel) with a heap.
+        Lazily yields the merged items; on ties items from earlier runs come first. """
+    import heapq
+    return heapq.merge(*runs, key=key)
+
+QUICK_SORT_CUTOFF = 16  # Partitions shorter than this are insertion sorted by quick_sort
+
+def _insertion_sort_range(items, lo, hi):
+    """ Insertion sort of items[lo:hi] in place. """
+    for i in range(lo + 1, hi):
+        x = items[i]
+        j = i - 1
+        while j >= lo and items[j] > x:
+            items[j+1] = items[j]
+            j -= 1
+        items[j+1] = x
+
+def _heap_sort_range(items, lo, hi):
+    """ Heap sort of items[lo:hi] in place, used by quick_sort when recursion gets too deep. """
+    def sift_down(root, end):
+        while True:
+            child = 2 * root + 1
+            if child >= end:
+                return
+            if child + 1 < end and items[lo+child] < items[lo+child+1]:
+                child += 1
+            if not items[lo+root] < items[lo+child]:
+                return
+            items[lo+root], items[lo+child] = items[lo+child], items[lo+root]
+            root = child
+
+    n = hi - lo
+    for root in range(n // 2 - 1, -1, -1):
+        sift_down(root, n)
+    for end in range(n - 1, 0, -1):
+        items[lo], items[lo+end] = items[lo+end], items[lo]
+        sift_down(0, end)
+
+def _median_of_three(items, a, b, c):
+    """ Returns whichever of the indices a, b, c holds the median of their items. """
+    x, y, z = items[a], items[b], items[c]
+    if x < y:
+        return b if y < z else (c if x < z else a)
+    return a if x < z else (c if y < z else b)
+
+def _introsort(items, lo, hi, depth):
+    """ Sorts items[lo:hi] in place; depth is the number of partitioning levels left
+        before switching to heap sort. """
+    while hi - lo > QUICK_SORT_CUTOFF:
+        if depth == 0:
+            _heap_sort_range(items, lo, hi)
+            return
+        depth -= 1
+        mid = (lo + hi) // 2
+        if hi - lo > 40:
+            # Tukey's ninther: the median of three medians of three, which resists the
+            # reversed and organ-pipe inputs that defeat a plain median of three.
+            e = (hi - lo) // 8
+            m = _median_of_three(items,
+                                 _median_of_three(items, lo, lo + e, lo + 2 * e),
+                                 _median_of_three(items, mid - e, mid, mid + e),
+                                 _median_of_three(items, hi - 1 - 2 * e, hi - 1 - e, hi - 1))
+        else:
+            m = _median_of_three(items, lo, mid, hi - 1)
+        items[lo], items[m] = items[m], items[lo]
+        pivot = items[lo]
+
+        # Bentley-McIlroy three-way partition: scan from both ends, parking items equal
+        # to the pivot at the two ends, then swap them into the middle. Afterwards
+        # [lo, lt) < pivot, [lt, gt) == pivot and [gt, hi) > pivot.
+        i, j = lo, hi
+        p, q = lo, hi
+        while True:
+            i += 1
+            while i < hi - 1 and items[i] < pivot:
+                i += 1
+            j -= 1
+            while j > lo and pivot < items[j]:
+                j -= 1
+            if i == j and not pivot < items[i] and not items[i] < pivot:
+                p += 1
+                items[p], items[i] = items[i], items[p]
+            if i >= j:
+                break
+            items[i], items[j] = items[j], items[i]
+            if not pivot < items[i] and not items[i] < pivot:
+                p += 1
+                items[p], items[i] = items[i], items[p]
+            if not pivot < items[j] and not items[j] < pivot:
+                q -= 1
+                items[q], items[j] = items[j], items[q]
+        i = j + 1
+        for k in range(lo, p + 1):
+            items[k], items[j] = items[j], items[k]
+            j -= 1
+        for k in range(hi - 1, q - 1, -1):
+            items[k], items[i] = items[i], items[k]
+            i += 1
+        lt, gt = j + 1, i
+
+        # Recurse into the smaller side and loop on the larger one, so the stack stays O(log n).
+        if lt - lo < hi - gt:
+            _introsort(items, lo, lt, depth)
+            lo = gt
+        else:
+            _introsort(items, gt, hi, depth)
+            hi = lt
+    _insertion_sort_range(items, lo, hi)
+
+def quick_sort(items):
+    """ Implementation of quick sort as an in-place introsort.
+        Uses median-of-three (ninther for large partitions) pivots, three-way partitioning so duplicates are not
+        partitioned again, insertion sort for small partitions, and falls back to heap
+        sort once the recursion depth exceeds 2*log2(n), which guarantees O(n log n)
+        time. Sorts items in place and returns it. """
     len_i = len(items)
+    if len_i > 1:
+        _introsort(items, 0, len_i, 2 * len_i.bit_length())
+    return items
 
-    if len_i <= 1:
+#=================================================================================================
+#                                   NUMPY-BACKED DISPATCH
+#=================================================================================================
+# sort() and search() accept lists, array.array or numpy arrays and hand large numeric inputs to
+# numpy kernels, falling back to the pure-Python implementations above for small inputs, for data
+# numpy cannot hold natively (strings, arbitrary objects, ints beyond 64 bits) or when numpy is
+# not installed. The thresholds below are where the numpy path became faster for int lists,
+# measured with `python -m bench crossover` (search_time_complexity.measure_dispatch_crossovers).
+# numpy arrays and array.array need no conversion, so they always take the numpy path.
+
+NUMPY_SORT_CROSSOVER = 16          # List length from which np.argsort beats quick_sort
+NUMPY_BINARY_SEARCH_RATIO = 0.08   # Targets per item from which np.searchsorted beats binary_search
+NUMPY_LINEAR_SEARCH_TARGETS = 4    # Targets from which converting an unsorted list beats linear_search
+
+_PYTHON_SORTS = {'quicksort': quick_sort, 'heapsort': quick_sort, 'stable': merge_sort}
+
+def _as_numpy(items, min_len):
+    """ Returns items as a numeric numpy array when the numpy kernels should handle it, else None.
+        Lists are only converted from min_len items and when every item converts exactly. """
+    from array import array
+    try:
+        import numpy as np
+    except ImportError:
+        return None
+    if isinstance(items, np.ndarray):
         return items
+    if isinstance(items, array):
+        try:
+            return np.frombuffer(items, dtype=items.typecode) if len(items) else np.array([])
+        except TypeError:  # Unicode arrays
+            return None
+    if len(items) < min_len:
+        return None
+    values = np.asarray(items)
+    if values.ndim != 1 or values.dtype.kind not in 'biu' and not (
+            values.dtype.kind == 'f' and all(type(x) is float for x in items)):
+        return None
+    return values
+
+def _check_method(method):
+    if method not in ('auto', 'numpy', 'python'):
+        raise ValueError(f"Unknown method '{method}', expected 'auto', 'numpy' or 'python'.")
 
-    pivot = items[index]
-    small = []
-    large = []
-    dup = []
-    for i in items:
-        if i < pivot:
-            small.append(i)
-        elif i > pivot:
-            large.append(i)
-        elif i == pivot:
-            dup.append(i)
-
-    small = quick_sort(small)
-    large = quick_sort(large)
-
-    return small + dup + large
+def sort(items, kind='quicksort', method='auto'):
+    """ Returns a sorted copy of items: a numpy array or array.array for those inputs, otherwise
+        a list.
+        kind is numpy's: 'quicksort' (introsort), 'heapsort' or 'stable'. The pure-Python path uses
+        quick_sort, or merge_sort when kind='stable'.
+        method='numpy' or 'python' forces a path, e.g. to measure the crossover; data numpy
+        cannot hold still takes the pure-Python path. """
+    from array import array
+    _check_method(method)
+    if kind not in _PYTHON_SORTS:
+        raise ValueError(f"Unknown kind '{kind}', expected one of {list(_PYTHON_SORTS)}.")
+    values = None
+    if method != 'python':
+        values = _as_numpy(items, NUMPY_SORT_CROSSOVER if method == 'auto' else 0)
+    is_array = isinstance(items, array)
+    if values is None:
+        result = _PYTHON_SORTS[kind](list(items))
+        if is_array:
+            return array(items.typecode, result)
+        if hasattr(items, 'dtype'):  # A numpy array forced onto the Python path
+            import numpy as np
+            return np.array(result, dtype=items.dtype)
+        return result
+    if values is not items and not is_array:
+        # Gathering the original objects keeps their types, e.g. bools stay bools.
+        return [items[i] for i in values.argsort(kind=kind).tolist()]
+    result = values.copy()
+    result.sort(kind=kind)
+    return array(items.typecode, result.tobytes()) if is_array else result
+
+def search(items, targets, is_sorted=False, method='auto'):
+    """ Batched search: returns, for each target, the index of its first occurrence in items or
+        -1 if it is absent, as a numpy array for numpy input and a list otherwise.
+        is_sorted=True: items are sorted ascending, so each lookup is a binary search
+            (np.searchsorted, or binary_search per target).
+        is_sorted=False: linear scans (np.flatnonzero, or linear_search per target). Many targets
+            are instead looked up in a stable argsort of items, which gives the same first indices
+            in O((n + m) log n).
+        method='numpy' or 'python' forces a path, as for sort. """
+    _check_method(method)
+    targets = list(targets) if not hasattr(targets, '__len__') else targets
+    values = None
+    if method == 'numpy':
+        values = _as_numpy(items, 0)
+    elif method == 'auto':
+        # Converting a list costs O(n), so it only pays off with enough targets: per item for
+        # O(log n) binary searches, in absolute terms for O(n) scans.
+        if is_sorted:
+            convert_list = len(targets) >= NUMPY_BINARY_SEARCH_RATIO * len(items)
+        else:
+            convert_list = len(targets) >= NUMPY_LINEAR_SEARCH_TARGETS
+        values = _as_numpy(items, 0 if convert_list else float('inf'))
+    if values is None:
+        python_search = binary_search if is_sorted else linear_search
+        indices = [python_search(items, t) for t in targets]
+        indices = [-1 if i is None else i for i in indices]
+        if hasattr(items, 'dtype'):  # A numpy array forced onto the Python path
+            import numpy as np
+            return np.array(indices, dtype=np.intp)
+        return indices
+
+    import numpy as np
+    is_numpy = isinstance(items, np.ndarray)
+    if is_sorted:
+        indices = binary_search_many(values, targets)
+    elif len(targets) <= len(values).bit_length() or len(values) == 0:
+        # m scans of O(n) each are cheaper than an O(n log n) argsort while m <= log2(n).
+        indices = np.full(len(targets), -1, dtype=np.intp)
+        for k, target in enumerate(targets):
+            hits = np.flatnonzero(values == target)
+            if len(hits):
+                indices[k] = hits[0]
+    else:
+        order = values.argsort(kind='stable')
+        positions = binary_search_many(values[order], targets)
+        indices = np.where(positions >= 0, order[np.maximum(positions, 0)], -1)
+    return indices if is_numpy else indices.tolist()
@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+""" Command line entry point for the search and sort benchmarks.
+
+    python -m bench search --algorithms linear binary --sizes 1000 10000 100000 --reps 100
+    python -m bench sort --sizes 1000 100000 --timeout 30 --output sort.json --baseline old.json
+    python -m bench crossover
+
+Measured cells are kept in a result cache (--cache, default .bench_cache.json) and reused by later
+runs with the same parameters. Only the standard library is imported until a command runs. """
+
+import argparse
+import json
+import sys
+
+DEFAULT_CACHE = '.bench_cache.json'
+
+def _short_name(name):
+    """ 'Linear Search' -> 'linear', the name used on the command line. """
+    return name.split()[0].lower()
+
+def _select(registry, names, kind):
+    """ Maps command line names onto registry names; all of them when names is empty. """
+    by_short_name = {_short_name(name): name for name in registry}
+    if not names:
+        return list(registry)
+    unknown = [name for name in names if name not in by_short_name]
+    if unknown:
+        raise SystemExit(f"Unknown {kind} algorithm(s) {unknown}, expected {sorted(by_short_name)}.")
+    return [by_short_name[name] for name in names]
+
+def _open_cache(args):
+    if args.no_cache:
+        return None
+    from result_cache import ResultCache
+    return ResultCache(args.cache)
+
+#=================================================================================================
+#                                          SEARCH COMMAND
+#=================================================================================================
+
+def run_search(args):
+    import implement_search
+    import search_time_complexity as tc
+    from result_cache import ResultCache, source_fingerprint
+
+    cache = _open_cache(args)
+    records = []
+    table_of_results = {}
+    for name in _select(implement_search.SEARCH_ALGORITHMS, args.algorithms, 'search'):
+        func = implement_search.SEARCH_ALGORITHMS[name]
+        table = table_of_results[name] = {'len_of_arrays': [], 'exec_times': []}
+        for size in args.sizes:
+            key = ResultCache.key('search', name, size, args.reps, args.seed, args.min_time,
+                                  args.repeat, source_fingerprint(func))
+            result = cache.get(key) if cache is not None else None
+            cached = result is not None
+            if not cached:
+                result = tc.time_search(func, size, args.reps, args.seed, args.min_time, args.repeat)
+                if cache is not None:
+                    cache.put(key, result)
+            records.append({'algorithm': name, 'size': size, 'reps': args.reps, 'seed': args.seed,
+                            'median': result['median'], 'iqr': result['iqr'], 'cached': cached})
+            table['len_of_arrays'].append(size)
+            table['exec_times'].append(result['median'])
+            print(f"{name:<15} {size:>10} {result['median'] * 1e6:>12.3f} us"
+                  f"{'  (cached)' if cached else ''}")
+            if cache is not None:
+                cache.save()
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(records, f, indent=2)
+    if args.plot:
+        implement_search.plot_results(table_of_results, args.plot)
+    return 0
+
+#=================================================================================================
+#                                           SORT COMMAND
+#=================================================================================================
+
+def run_sort(args):
+    import sort_benchmark as sb
+
+    def progress(result):
+        timing = f"{result['median'] * 1e3:>12.3f} ms" if result['status'] == 'ok' else result['status']
+        print(f"{result['algorithm']:<15} {result['distribution']:<14} {result['size']:>10} {timing}")
+
+    cache = _open_cache(args)
+    distributions = args.distributions or list(sb.DISTRIBUTIONS)
+    unknown = [name for name in distributions if name not in sb.DISTRIBUTIONS]
+    if unknown:
+        raise SystemExit(f"Unknown distribution(s) {unknown}, expected {list(sb.DISTRIBUTIONS)}.")
+    try:
+        results = sb.run_sweep(_select(sb.SORT_ALGORITHMS, args.algorithms, 'sort'), distributions,
+                               args.sizes, args.reps, args.timeout, args.processes, args.seed,
+                               progress, cache)
+    finally:
+        if cache is not None:
+            cache.save()
+
+    if args.output:
+        sb.save_results(results, args.output)
+    status = 0
+    if args.baseline:
+        diff = sb.diff_results(sb.load_results(args.baseline), results, args.tolerance)
+        regressions = [d for d in diff if d['regression']]
+        for d in regressions:
+            print(f"REGRESSION {d['algorithm']} {d['distribution']} {d['size']}: "
+                  f"{d['old_median']} -> {d['new_median']}")
+        print(f'{len(regressions)} of {len(diff)} cells regressed against {args.baseline}')
+        status = 1 if regressions else 0
+    if args.plot:
+        import implement_search
+        table_of_results = {}
+        for r in results:
+            if r['status'] == 'ok':
+                table = table_of_results.setdefault(f"{r['algorithm']} ({r['distribution']})",
+                                                    {'len_of_arrays': [], 'exec_times': []})
+                table['len_of_arrays'].append(r['size'])
+                table['exec_times'].append(r['median'])
+        implement_search.plot_results(table_of_results, args.plot)
+    return status
+
+#=================================================================================================
+#                                        CROSSOVER COMMAND
+#=================================================================================================
+
+def run_crossover(args):
+    import algorithms as alg
+    import search_time_complexity as tc
+
+    measured = tc.measure_dispatch_crossovers(args.seed, MIN_TIME=args.min_time, REPEAT=args.repeat)
+    print('# Measured thresholds; update the constants in algorithms.py if they differ.')
+    for name, value in measured.items():
+        print(f'{name} = {value!r:<10} # currently {getattr(alg, name)!r}')
+    return 0
+
+#=================================================================================================
+#                                       ARGUMENT PARSING
+#=================================================================================================
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='python -m bench', description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument('--algorithms', nargs='+', metavar='NAME',
+                        help='Algorithms by first word, e.g. linear binary; default all.')
+    common.add_argument('--seed', type=int, default=0, help='Random seed of the input data.')
+    common.add_argument('--cache', default=DEFAULT_CACHE, help='Result cache file.')
+    common.add_argument('--no-cache', action='store_true', help='Measure every cell again.')
+    common.add_argument('--output', help='Write the results to this file.')
+    common.add_argument('--plot', help='Save a plot of time against size to this image file.')
+
+    search = commands.add_parser('search', parents=[common], help='Benchmark the search algorithms.')
+    search.add_argument('--sizes', nargs='+', type=int, default=[1000, 10000, 100000])
+    search.add_argument('--reps', type=int, default=100, help='Distinct targets searched per size.')
+    search.add_argument('--min-time', type=float, default=0.05, help='Seconds of timing per size.')
+    search.add_argument('--repeat', type=int, default=5, help='Timed trials per size.')
+    search.set_defaults(func=run_search)
+
+    sort = commands.add_parser('sort', parents=[common], help='Run the sorting benchmark sweep.')
+    sort.add_argument('--distributions', nargs='+', metavar='NAME',
+                      help='Input distributions; default all.')
+    sort.add_argument('--sizes', nargs='+', type=int, default=None,
+                      help='Input sizes; default 100 to 1000000.')
+    sort.add_argument('--reps', type=int, default=3, help='Timed sorts per cell.')
+    sort.add_argument('--timeout', type=float, default=60.0, help='Seconds allowed per cell.')
+    sort.add_argument('--processes', type=int, default=None, help='Cells run at once; default CPUs.')
+    sort.add_argument('--baseline', help='Previous results to diff against.')
+    sort.add_argument('--tolerance', type=float, default=0.1,
+                      help='Allowed slowdown before a cell counts as a regression.')
+    sort.set_defaults(func=run_sort)
+
+    crossover = commands.add_parser('crossover', help='Measure the numpy dispatch thresholds of '
+                                                      'algorithms.sort and algorithms.search.')
+    crossover.add_argument('--seed', type=int, default=0, help='Random seed of the input data.')
+    crossover.add_argument('--min-time', type=float, default=0.05, help='Seconds of timing per size.')
+    crossover.add_argument('--repeat', type=int, default=5, help='Timed trials per size.')
+    crossover.set_defaults(func=run_crossover)
+    return parser
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    return args.func(args)
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+
+import heapq
+import itertools
+import os
+import tempfile
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+
+#=================================================================================================
+# External (out-of-core) merge sort for numeric keys that do not fit in memory.
+# The input is cut into runs that fit in the memory budget, each run is sorted and spilled to a
+# temporary file as raw machine values (array.array), and the runs are then k-way merged with a
+# heap, reading every run back in small blocks. Nothing but the runs being sorted and the merge
+# buffers is held in memory, and the sorted output is streamed from a generator.
+#=================================================================================================
+
+MAX_OPEN_RUNS = 128  # Runs merged at once; more runs are first merged in intermediate passes
+BOXED_ITEM_BYTES = 40  # Extra bytes per value when sorted() boxes it: a list slot and the object
+
+try:
+    import numpy as np
+except ImportError:  # Runs are then sorted with sorted(), and sized for its per-value cost.
+    np = None
+
+def _sort_run(run, typecode):
+    """ Sorts an array.array in place. With numpy the values are sorted inside the array's own
+        buffer; otherwise sorted() boxes every value into a Python object. """
+    if np is not None:
+        np.frombuffer(run, dtype=typecode).sort()
+    else:
+        run[:] = array(typecode, sorted(run))
+
+def _bytes_per_item(typecode):
+    """ Peak bytes held per value while a run is filled and sorted. """
+    itemsize = array(typecode).itemsize
+    return itemsize if np is not None else itemsize + BOXED_ITEM_BYTES
+
+def read_binary_keys(path, typecode='d', block_items=65536):
+    """ Streams the values of a binary file of array.array(typecode) items, block by block.
+        One block buffer is reused and filled with readinto, so no temporary bytes copy of a
+        block is made. """
+    block = array(typecode, [0]) * block_items
+    with open(path, 'rb') as f:
+        while True:
+            with memoryview(block) as view, view.cast('B') as raw:
+                count = f.readinto(raw) // block.itemsize
+            yield from itertools.islice(block, count)
+            if count < block_items:
+                return
+
+def write_binary_keys(path, values, typecode='d', block_items=65536):
+    """ Writes an iterable of numbers to path as raw array.array(typecode) values. """
+    with open(path, 'wb') as f:
+        block = array(typecode)
+        for value in values:
+            block.append(value)
+            if len(block) >= block_items:
+                block.tofile(f)
+                block = array(typecode)
+        block.tofile(f)
+
+def _sort_run_file(path, typecode):
+    """ Sorts a run file in place. Runs in a worker process when a pool is used, so only the
+        path, not the data, is sent between processes. """
+    run = array(typecode)
+    with open(path, 'rb') as f:
+        run.fromfile(f, os.fstat(f.fileno()).st_size // run.itemsize)
+    _sort_run(run, typecode)
+    with open(path, 'wb') as f:
+        run.tofile(f)
+    return path
+
+def _merge_run_files(paths, output_path, typecode, block_items):
+    """ k-way merges sorted run files into one sorted run file. """
+    write_binary_keys(output_path,
+                      heapq.merge(*(read_binary_keys(p, typecode, block_items) for p in paths)),
+                      typecode, block_items)
+    for path in paths:
+        os.remove(path)
+
+def external_sort(values, memory_limit=64 * 1024 * 1024, typecode='d', processes=None,
+                  tmpdir=None):
+    """ Sorts an iterable of numbers of any length with bounded memory.
+
+        values: any iterable of numbers, e.g. read_binary_keys(path) or a generator over a text file.
+        memory_limit: approximate bytes of values held in memory at once. It is shared between
+            the runs being filled and sorted, and the read buffers of the merge.
+        typecode: array.array typecode of the spilled values, e.g. 'd' for floats or 'q' for
+            64-bit integers such as Field_IDs or timestamps.
+        processes: sort runs in a ProcessPoolExecutor with this many workers; None sorts them here.
+        tmpdir: directory for the run files; defaults to the system temporary directory.
+
+        Returns a generator yielding the values in ascending order. The run files are removed
+        when the generator is exhausted or closed. """
+    itemsize = array(typecode).itemsize
+    # With a pool, one run is being filled here while each worker sorts another.
+    runs_in_memory = processes + 1 if processes else 1
+    run_items = max(memory_limit // (_bytes_per_item(typecode) * runs_in_memory), 1024)
+
+    with tempfile.TemporaryDirectory(dir=tmpdir) as workdir:
+        paths = []
+        pool = ProcessPoolExecutor(max_workers=processes) if processes else None
+        try:
+            futures = []
+            run = array(typecode)
+            iterator = iter(values)
+            while True:
+                for value in iterator:
+                    run.append(value)
+                    if len(run) >= run_items:
+                        break
+                if not run:
+                    break
+                path = os.path.join(workdir, f'run_{len(paths)}.bin')
+                paths.append(path)
+                if pool is None:
+                    _sort_run(run, typecode)
+                    with open(path, 'wb') as f:
+                        run.tofile(f)
+                else:
+                    with open(path, 'wb') as f:
+                        run.tofile(f)
+                    # Bound the runs in flight so memory stays within the budget.
+                    if len(futures) >= processes:
+                        futures.pop(0).result()
+                    futures.append(pool.submit(_sort_run_file, path, typecode))
+                run = array(typecode)
+            for future in futures:
+                future.result()
+        finally:
+            if pool is not None:
+                pool.shutdown()
+
+        block_items = max(memory_limit // (itemsize * max(min(len(paths), MAX_OPEN_RUNS), 1)), 1024)
+        while len(paths) > MAX_OPEN_RUNS:
+            merged = []
+            for i in range(0, len(paths), MAX_OPEN_RUNS):
+                output_path = os.path.join(workdir, f'merge_{len(paths)}_{i}.bin')
+                _merge_run_files(paths[i:i + MAX_OPEN_RUNS], output_path, typecode, block_items)
+                merged.append(output_path)
+            paths = merged
+
+        yield from heapq.merge(*(read_binary_keys(path, typecode, block_items) for path in paths))
+
+def external_sort_file(input_path, output_path, typecode='d', memory_limit=64 * 1024 * 1024,
+                       processes=None):
+    """ Sorts a binary file of array.array(typecode) values into output_path with bounded memory. """
+    write_binary_keys(output_path,
+                      external_sort(read_binary_keys(input_path, typecode), memory_limit,
+                                    typecode, processes,
+                                    os.path.dirname(os.path.abspath(output_path))),
+                      typecode)
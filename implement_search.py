@@ -1,33 +1,53 @@
 #!/usr/bin/env python3
 
 import search_time_complexity as tc
-import matplotlib.pyplot as plt
 import algorithms as alg
 
 #=================================================================================================
-# Initialise a list to reference the appropriate algorithm.
+# Initialise a dictionary to reference the appropriate algorithm.
 # Initialise a dictionary to store the experimental results.
+# Nothing runs at import time; use generate_experiment_results or `python -m bench search`.
 #=================================================================================================
 
-search_algorithm = ['Linear Search','Binary Search']
-table_of_results = {'Linear Search':{},'Binary Search':{}}
+SEARCH_ALGORITHMS = {'Linear Search': alg.linear_search, 'Binary Search': alg.binary_search}
+search_algorithm = list(SEARCH_ALGORITHMS)
+table_of_results = {name: {} for name in SEARCH_ALGORITHMS}
 #=================================================================================================
-# We make use of the functions found in the search_time_complexity package to generate experimental 
+# We make use of the functions found in the search_time_complexity package to generate experimental
 # results that will be used for plotting the graphs.
 #=================================================================================================
 
 def generate_experiment_results(search_algorithm,table_of_results,STEP=1000, REPS_PER_ARR=1000, MAX_ARR_LEN=10000):
-    if search_algorithm == 'Linear Search':
-        exec_times, len_of_arrays = tc.run_experiment(alg.linear_search,search_algorithm,STEP,REPS_PER_ARR,MAX_ARR_LEN)
-    elif search_algorithm == 'Binary Search':
-        exec_times, len_of_arrays = tc.run_experiment(alg.binary_search,search_algorithm,STEP,REPS_PER_ARR,MAX_ARR_LEN)
+    if search_algorithm not in SEARCH_ALGORITHMS:
+        raise ValueError(f"Unknown search algorithm '{search_algorithm}', expected one of {list(SEARCH_ALGORITHMS)}.")
+    len_of_arrays, exec_times = tc.run_experiment(SEARCH_ALGORITHMS[search_algorithm],search_algorithm,STEP,REPS_PER_ARR,MAX_ARR_LEN)
 
+    table_of_results.setdefault(search_algorithm, {})
     table_of_results[search_algorithm]['exec_times'] = exec_times
     table_of_results[search_algorithm]['len_of_arrays'] = len_of_arrays
     return table_of_results
 
 #=================================================================================================
-# Execute the function defined above to populate the dictionary with experimental results.
+# Plot the experimental results. matplotlib is only imported here.
 #=================================================================================================
-table_of_results = generate_experiment_results('Linear Search',table_of_results)
-table_of_results = generate_experiment_results('Binary Search',table_of_results)
+
+def plot_results(table_of_results, path=None):
+    """ Plots execution time against array length for every algorithm in table_of_results.
+        Saves the figure to path if given, otherwise shows it. """
+    import matplotlib
+    if path is not None:
+        matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+
+    fig, ax = plt.subplots()
+    for name, results in table_of_results.items():
+        if results:
+            ax.plot(results['len_of_arrays'], results['exec_times'], marker='.', label=name)
+    ax.set_xlabel('Length of array')
+    ax.set_ylabel('Execution time (s)')
+    ax.legend()
+    if path is not None:
+        fig.savefig(path)
+        plt.close(fig)
+    else:
+        plt.show()
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+import numpy as np
+import algorithms as alg
+
+#=================================================================================================
+# Multi-core sort and search. The data lives in a multiprocessing.shared_memory block that the
+# worker processes map as a numpy array, so only the block's name and index ranges are pickled.
+#=================================================================================================
+
+SAMPLES_PER_PROCESS = 64  # Sample size per partition used to pick the sample-sort splitters
+
+def _attach(name):
+    """ Attaches to an existing shared memory block without taking ownership of it. """
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)  # Python 3.13+
+    except TypeError:
+        # Older Pythons register the attachment with the resource tracker, which the pool
+        # workers share with the parent that created (and will unlink) the block.
+        return shared_memory.SharedMemory(name=name)
+
+def _to_shared(values):
+    """ Copies a numpy array into a new shared memory block; returns the block and its view. """
+    shm = shared_memory.SharedMemory(create=True, size=max(values.nbytes, 1))
+    shared = np.ndarray(values.shape, dtype=values.dtype, buffer=shm.buf)
+    shared[:] = values
+    return shm, shared
+
+def _sort_shared_slice(name, dtype, length, lo, hi):
+    """ Worker: sorts shared[lo:hi] in place. """
+    shm = _attach(name)
+    shared = np.ndarray((length,), dtype=dtype, buffer=shm.buf)
+    try:
+        shared[lo:hi].sort()
+    finally:
+        del shared
+        shm.close()
+
+def _search_shared(name, dtype, length, targets):
+    """ Worker: batched binary search of targets in the shared sorted array. """
+    shm = _attach(name)
+    shared = np.ndarray((length,), dtype=dtype, buffer=shm.buf)
+    try:
+        return alg.binary_search_many(shared, targets)
+    finally:
+        del shared
+        shm.close()
+
+def parallel_sort(items, processes=None, method='sample', seed=0):
+    """ Sorts a list or array across several processes and returns a sorted numpy array.
+
+        method='sample': sample sort. Splitters taken from a random sample cut the values into
+            one bucket per process; the buckets are laid out contiguously (a linear-time counting
+            pass) and each process sorts its bucket in place, so no merge is needed.
+        method='chunks': each process sorts an equal slice in place, then the sorted slices are
+            merged by a run-aware merge sort.
+        processes: worker count, defaults to the number of CPUs. """
+    values = np.asarray(items)
+    processes = processes or os.cpu_count() or 1
+    if processes == 1 or len(values) < 2 * processes:
+        return np.sort(values)
+
+    if method == 'sample':
+        rng = np.random.default_rng(seed)
+        sample = np.sort(rng.choice(values, size=min(len(values), SAMPLES_PER_PROCESS * processes)))
+        splitters = sample[np.linspace(0, len(sample), processes + 1, dtype=int)[1:-1]]
+        buckets = np.searchsorted(splitters, values, side='right').astype(np.min_scalar_type(processes))
+        # A stable sort of small integer bucket ids is a radix sort, i.e. linear time.
+        values = values[np.argsort(buckets, kind='stable')]
+        bounds = np.concatenate(([0], np.cumsum(np.bincount(buckets, minlength=processes))))
+    elif method == 'chunks':
+        bounds = np.linspace(0, len(values), processes + 1, dtype=int)
+    else:
+        raise ValueError(f"Unknown method '{method}', expected 'sample' or 'chunks'.")
+
+    shm, shared = _to_shared(values)
+    try:
+        with ProcessPoolExecutor(max_workers=processes) as pool:
+            futures = [pool.submit(_sort_shared_slice, shm.name, values.dtype, len(values), lo, hi)
+                       for lo, hi in zip(bounds[:-1], bounds[1:]) if hi - lo > 1]
+            for future in futures:
+                future.result()
+        result = np.array(shared)
+    finally:
+        del shared
+        shm.close()
+        shm.unlink()
+
+    if method == 'chunks':
+        result.sort(kind='stable')  # Timsort merges the already sorted runs in O(n log p)
+    return result
+
+def parallel_search(items, targets, processes=None):
+    """ Batched binary search of many targets in a sorted list or array, with the targets fanned
+        out over worker processes. Returns a numpy array with, for each target, the index of its
+        first occurrence in items or -1 if it is absent (see algorithms.binary_search_many). """
+    values = np.asarray(items)
+    targets = np.asarray(targets)
+    processes = processes or os.cpu_count() or 1
+    if processes == 1 or len(targets) < 2 * processes or len(values) == 0:
+        return alg.binary_search_many(values, targets)
+
+    shm, shared = _to_shared(values)
+    try:
+        with ProcessPoolExecutor(max_workers=processes) as pool:
+            futures = [pool.submit(_search_shared, shm.name, values.dtype, len(values), chunk)
+                       for chunk in np.array_split(targets, processes)]
+            return np.concatenate([future.result() for future in futures])
+    finally:
+        del shared
+        shm.close()
+        shm.unlink()
@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+
+import hashlib
+import inspect
+import json
+import os
+
+#=================================================================================================
+# JSON file cache of benchmark results, so cells that were already measured are not re-run.
+# A key holds the cell's parameters and a fingerprint of the source file the algorithm lives in,
+# so editing an algorithm invalidates its cached timings.
+#=================================================================================================
+
+_fingerprints = {}
+
+def source_fingerprint(*objects):
+    """ Returns a short hash of the source files defining the given functions or modules. """
+    digests = []
+    for path in sorted({inspect.getsourcefile(obj) for obj in objects}):
+        if path not in _fingerprints:
+            with open(path, 'rb') as f:
+                _fingerprints[path] = hashlib.sha1(f.read()).hexdigest()[:12]
+        digests.append(_fingerprints[path])
+    if len(digests) == 1:
+        return digests[0]
+    return hashlib.sha1(''.join(digests).encode()).hexdigest()[:12]
+
+class ResultCache:
+    """ Maps cell keys to result records, persisted as one JSON file. """
+
+    def __init__(self, path):
+        self.path = path
+        self.entries = {}
+        if os.path.exists(path):
+            with open(path) as f:
+                self.entries = json.load(f)
+
+    @staticmethod
+    def key(*parts):
+        """ Builds a key from JSON-serialisable parts, e.g. (algorithm, size, reps, seed). """
+        return json.dumps(parts)
+
+    def get(self, key):
+        return self.entries.get(key)
+
+    def put(self, key, result):
+        self.entries[key] = result
+
+    def save(self):
+        """ Writes the cache atomically, so an interrupted run cannot corrupt it. """
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(self.entries, f)
+        os.replace(tmp_path, self.path)
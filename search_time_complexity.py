@@ -1,37 +1,259 @@
 #!/usr/bin/env python3
 
+import itertools
 import os
 import time
-import numpy as np
+import timeit
 import algorithms as alg
 #=================================================================================================
-#                                       TQDM Installation
+# numpy and tqdm are imported inside the functions that use them, so importing this module is
+# instant and has no side effects.
 #=================================================================================================
-try:
-    from tqdm import tqdm
-except:
-    print("'tqdm' module not found.");
-    print("installing tqdm modle...")
-    os.system('pip install tqdm')
+
+def _progress(iterable, desc=''):
+    """ Wraps iterable in a tqdm progress bar when tqdm is installed. """
+    try:
+        from tqdm import tqdm
+    except ImportError:
+        return iterable
+    return tqdm(iterable, desc=desc)
+
+#=================================================================================================
+#                                       BENCHMARK ENGINE
+#=================================================================================================
+
+def _noop(*args):
+    pass
+
+def benchmark(func, make_args, MIN_TIME=0.2, REPEAT=7, WARMUP=1, CONFIDENCE=0.95, seed=0):
+    """ Times func(*make_args()) timeit-style and returns summary statistics per call.
+
+        The loop count is calibrated so each trial runs for at least MIN_TIME/REPEAT seconds, and
+        the garbage collector is disabled while timing (timeit does this). WARMUP trials are run
+        and discarded, then REPEAT trials are timed. The cost of make_args and of the Python call
+        itself, measured on an empty function with the same arguments, is subtracted, which
+        matters for sub-microsecond operations such as a binary search.
+
+        Returns a dict with the per-call 'median', 'q1', 'q3', 'iqr', 'min' and 'mean' in seconds,
+        a bootstrap confidence interval of the median ('ci_low', 'ci_high'), the loop count
+        'number' and the raw 'samples'. """
+    import numpy as np
+    timer = timeit.Timer(lambda: func(*make_args()))
+    overhead_timer = timeit.Timer(lambda: _noop(*make_args()))
+
+    number = 1
+    while True:
+        if timer.timeit(number) >= MIN_TIME / REPEAT:
+            break
+        number *= 2
+    for i in range(WARMUP):
+        timer.timeit(number)
+
+    samples = []
+    for i in range(REPEAT):
+        elapsed = timer.timeit(number) - overhead_timer.timeit(number)
+        samples.append(max(elapsed, 0.0) / number)
+    samples = np.array(samples)
+
+    q1, median, q3 = np.percentile(samples, [25, 50, 75])
+    rng = np.random.default_rng(seed)
+    boot = np.median(rng.choice(samples, size=(1000, len(samples))), axis=1)
+    ci_low, ci_high = np.percentile(boot, [50 * (1 - CONFIDENCE), 50 * (1 + CONFIDENCE)])
+    return {'median': float(median), 'q1': float(q1), 'q3': float(q3), 'iqr': float(q3 - q1),
+            'min': float(samples.min()), 'mean': float(samples.mean()), 'ci_low': float(ci_low),
+            'ci_high': float(ci_high), 'number': number, 'samples': samples.tolist()}
+
+#=================================================================================================
+#                                  EMPIRICAL COMPLEXITY FITTING
+#=================================================================================================
+
+def _log2(n):
+    import numpy as np
+    return np.log2(n)
+
+COMPLEXITY_MODELS = {
+    'O(1)': lambda n: 0 * n,
+    'O(log n)': lambda n: _log2(n),
+    'O(n)': lambda n: n,
+    'O(n log n)': lambda n: n * _log2(n),
+    'O(n^2)': lambda n: n ** 2,
+}
+
+# A more complex model is only chosen over a simpler one when it lowers the rms relative error
+# below MODEL_MARGIN times the simpler model's and by at least RMS_NOISE, so near ties, which are
+# decided by measurement noise, go to the simpler model.
+MODEL_MARGIN = 0.75
+RMS_NOISE = 0.02
+# A model whose growth term a*f(n) explains less than this fraction of the time at the largest
+# size describes no growth, and is rejected in favour of O(1).
+MIN_GROWTH = 0.05
+
+def fit_complexity(sizes, times):
+    """ Fits times ~ a*f(n) + b for every model in COMPLEXITY_MODELS by least squares on the
+        relative error, so small and large sizes weigh equally.
+        Returns the name of the best fitting model and, per model, its 'a', 'b' and 'rms' (the
+        root mean square relative error). Models are tried from the simplest, see MODEL_MARGIN;
+        models needing a negative or negligible growth coefficient are rejected. """
+    import numpy as np
+    n = np.asarray(sizes, dtype=float)
+    t = np.asarray(times, dtype=float)
+    weights = 1 / np.maximum(t, np.finfo(float).tiny)
+    fits = {}
+    for name, model in COMPLEXITY_MODELS.items():
+        design = np.column_stack([model(n), np.ones_like(n)]) * weights[:, None]
+        (a, b), *_ = np.linalg.lstsq(design, t * weights, rcond=None)
+        if name == 'O(1)':
+            a = 0.0
+        rms = np.sqrt(np.mean(((a * model(n) + b - t) * weights) ** 2))
+        growth = a * model(n[-1:])[0] / max(t[-1], np.finfo(float).tiny)
+        rejected = name != 'O(1)' and (a < 0 or growth < MIN_GROWTH)
+        fits[name] = {'a': float(a), 'b': float(b), 'rms': float('inf') if rejected else float(rms)}
+    best = 'O(1)'
+    for name in COMPLEXITY_MODELS:
+        rms, best_rms = fits[name]['rms'], fits[best]['rms']
+        if rms < MODEL_MARGIN * best_rms and best_rms - rms > RMS_NOISE:
+            best = name
+    return best, fits
+
+def estimate_complexity(algorithm, kind='search', SIZES=None, TARGETS=100, seed=0, **benchmark_kwargs):
+    """ Benchmarks an algorithm from algorithms.py over several input sizes and fits the
+        median times against the complexity models.
+
+        kind='search': algorithm(sorted_list, target), cycling through TARGETS random targets.
+        kind='sort': algorithm(list_copy), given a fresh copy of a random list on every call.
+        Returns the sizes, the benchmark result for each size and the fit_complexity result. """
+    import numpy as np
+    if SIZES is None:
+        SIZES = [2 ** k for k in range(6, 13)] if kind == 'sort' else [2 ** k for k in range(6, 17, 2)]
+    rng = np.random.default_rng(seed)
+    results = []
+    for size in SIZES:
+        values = rng.integers(0, 10 * size, size=size)  # Few duplicates, so searches scan ~n/2
+        if kind == 'search':
+            # Sorting before tolist() allocates the int objects in list order. Sorting the list
+            # instead would scatter them in memory, and the cache misses of a scan over them
+            # grow with n, making a linear search look O(n log n).
+            array = np.sort(values).tolist()
+            targets = itertools.cycle(rng.choice(array, size=TARGETS).tolist())
+            make_args = lambda: (array, next(targets))
+        elif kind == 'sort':
+            array = values.tolist()
+            make_args = lambda: (list(array),)
+        else:
+            raise ValueError(f"Unknown kind '{kind}', expected 'search' or 'sort'.")
+        results.append(benchmark(algorithm, make_args, seed=seed, **benchmark_kwargs))
+    best, fits = fit_complexity(SIZES, [r['median'] for r in results])
+    return SIZES, results, (best, fits)
 
 #=================================================================================================
 #                                  FUNCTION TO RUN EXPERIMENTS
 #=================================================================================================
 
-def run_experiment(algorithm,desc='',STEP=1000, REPS_PER_ARR=100, MAX_ARR_LEN=100000):
+def time_search(algorithm, size, REPS_PER_ARR=100, seed=None, MIN_TIME=0.05, REPEAT=5):
+    """ Times a search algorithm on one sorted random array of the given length, cycling through
+        REPS_PER_ARR targets drawn from the array. seed=None draws fresh random data.
+        Returns the benchmark result. """
+    import numpy as np
+    rng = np.random.default_rng(seed)
+    array = rng.integers(1000, size=size).tolist()
+    array.sort()
+    #Randomly select the targets from the array
+    targets = itertools.cycle([array[k] for k in rng.integers(len(array), size=REPS_PER_ARR)])
+    return benchmark(algorithm, lambda: (array, next(targets)), MIN_TIME=MIN_TIME, REPEAT=REPEAT,
+                     seed=seed or 0)
+
+def run_experiment(algorithm,desc='',STEP=1000, REPS_PER_ARR=100, MAX_ARR_LEN=100000, MIN_TIME=0.05, REPEAT=5, seed=None):
+    """ Measures a search algorithm on sorted random arrays of growing length.
+        Each array length is timed with time_search and the median time per call is reported.
+        Returns the array lengths and the execution times. """
     len_of_arr = []
     exec_times = []
-    for i in tqdm(range(1,MAX_ARR_LEN+STEP, STEP),desc='Experiment Progress '+'('+desc+')'):
-        array = np.random.randint(1000, size=i).tolist()
-        array.sort()
-        cumulative_execution_time=0
-        for j in range(REPS_PER_ARR):
-            target = array[np.random.randint(len(array))]  #Randomly select an element from the array
-            start = time.perf_counter()
-            algorithm(array,target)
-            end = time.perf_counter()
-            cumulative_execution_time = cumulative_execution_time + (end-start)
-        avg_execution_time = cumulative_execution_time/REPS_PER_ARR
+    for i in _progress(range(1,MAX_ARR_LEN+STEP, STEP),desc='Experiment Progress '+'('+desc+')'):
+        result = time_search(algorithm, i, REPS_PER_ARR, seed, MIN_TIME, REPEAT)
         len_of_arr.append(i)
-        exec_times.append(avg_execution_time)
+        exec_times.append(result['median'])
     return  len_of_arr,exec_times
+
+#=================================================================================================
+#                              FUNCTION TO MEASURE PARALLEL SPEEDUP
+#=================================================================================================
+
+def run_speedup_experiment(parallel_algorithm, ARR_LEN=10000000, PROCESS_COUNTS=None, REPS=3):
+    """ Times parallel_algorithm(array, processes) on one random array for each process count
+        and reports the speedup over a single process, e.g. for parallel_algorithms.parallel_sort.
+        Returns the process counts, the best execution time of each and the speedups. """
+    if PROCESS_COUNTS is None:
+        PROCESS_COUNTS = [2 ** k for k in range((os.cpu_count() or 1).bit_length())]
+    import numpy as np
+    array = np.random.random(ARR_LEN)
+    exec_times = []
+    for processes in PROCESS_COUNTS:
+        best = float('inf')
+        for j in range(REPS):
+            start = time.perf_counter()
+            parallel_algorithm(array, processes)
+            end = time.perf_counter()
+            best = min(best, end - start)
+        exec_times.append(best)
+    baseline = exec_times[PROCESS_COUNTS.index(1)] if 1 in PROCESS_COUNTS else exec_times[0]
+    speedups = [baseline / t for t in exec_times]
+    return PROCESS_COUNTS, exec_times, speedups
+
+#=================================================================================================
+#                           CROSSOVER OF THE NUMPY DISPATCH IN ALGORITHMS.PY
+#=================================================================================================
+
+def measure_crossover(python_func, numpy_func, make_args, SIZES, seed=0, **benchmark_kwargs):
+    """ Benchmarks two implementations of the same operation over growing sizes.
+        make_args(size, rng) returns the argument tuple for one size.
+        Returns the smallest size from which numpy_func is faster at that and every larger size
+        (None if it never is), and the median times of both per size. """
+    import numpy as np
+    rng = np.random.default_rng(seed)
+    python_times, numpy_times = [], []
+    for size in SIZES:
+        args = make_args(size, rng)
+        python_times.append(benchmark(python_func, lambda: args, seed=seed, **benchmark_kwargs)['median'])
+        numpy_times.append(benchmark(numpy_func, lambda: args, seed=seed, **benchmark_kwargs)['median'])
+    crossover = None
+    for size, python_time, numpy_time in reversed(list(zip(SIZES, python_times, numpy_times))):
+        if numpy_time >= python_time:
+            break
+        crossover = size
+    return crossover, python_times, numpy_times
+
+def measure_dispatch_crossovers(seed=0, ITEMS=100000, **benchmark_kwargs):
+    """ Measures the thresholds used by algorithms.sort and algorithms.search on random int lists.
+        The search thresholds are numbers of targets: per item for binary search, measured on
+        ITEMS sorted items, and absolute for linear search, measured on ITEMS // 10 items.
+        Returns a dict from the algorithms.py constant names to their measured values, with
+        None where numpy never won. """
+    import numpy as np
+    benchmark_kwargs.setdefault('MIN_TIME', 0.05)
+    benchmark_kwargs.setdefault('REPEAT', 5)
+
+    def random_list(size, rng):
+        return rng.integers(0, 10 * size + 1, size=size).tolist()
+
+    sort_crossover = measure_crossover(
+        lambda items: alg.sort(items, method='python'), lambda items: alg.sort(items, method='numpy'),
+        lambda size, rng: (random_list(size, rng),), [2 ** k for k in range(15)], seed,
+        **benchmark_kwargs)[0]
+
+    items = sorted(random_list(ITEMS, np.random.default_rng(seed)))
+    binary_crossover = measure_crossover(
+        lambda targets: alg.search(items, targets, is_sorted=True, method='python'),
+        lambda targets: alg.search(items, targets, is_sorted=True, method='numpy'),
+        lambda size, rng: (random_list(size, rng),), [2 ** k for k in range(15)], seed,
+        **benchmark_kwargs)[0]
+
+    # Absent targets, so every Python scan covers the whole list.
+    unsorted_items = random_list(ITEMS // 10, np.random.default_rng(seed))
+    linear_crossover = measure_crossover(
+        lambda targets: alg.search(unsorted_items, targets, method='python'),
+        lambda targets: alg.search(unsorted_items, targets, method='numpy'),
+        lambda size, rng: ([-1] * size,), [2 ** k for k in range(7)], seed, **benchmark_kwargs)[0]
+
+    return {'NUMPY_SORT_CROSSOVER': sort_crossover,
+            'NUMPY_BINARY_SEARCH_RATIO': None if binary_crossover is None else binary_crossover / ITEMS,
+            'NUMPY_LINEAR_SEARCH_TARGETS': linear_crossover}
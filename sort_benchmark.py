@@ -0,0 +1,274 @@
+#!/usr/bin/env python3
+
+import csv
+import json
+import multiprocessing
+import os
+import time
+from multiprocessing.connection import wait
+import algorithms as alg
+
+#=================================================================================================
+# Benchmark suite for the sorting algorithms over several input distributions.
+# Every (algorithm x distribution x size) cell runs in its own worker process with a timeout, so
+# a quadratic sort on a large input is stopped instead of stalling the sweep. Once a cell times
+# out, the larger sizes of the same algorithm and distribution are skipped, and sorts that start
+# worker processes of their own run alone.
+#=================================================================================================
+
+def external_sort(items):
+    """ external_sort.external_sort collected into a list, so it can be compared with the others. """
+    import external_sort as ext
+    return list(ext.external_sort(items, typecode='q'))
+
+def parallel_sort(items):
+    """ parallel_algorithms.parallel_sort returned as a list. """
+    import parallel_algorithms as par
+    return par.parallel_sort(items).tolist()
+
+SORT_ALGORITHMS = {
+    'Bubble Sort': alg.bubble_sort,
+    'Insertion Sort': alg.insertion_sort,
+    'Merge Sort': alg.merge_sort,
+    'Quick Sort': alg.quick_sort,
+    'External Sort': external_sort,
+    'Parallel Sort': parallel_sort,
+}
+
+# Modules implementing the algorithms whose entry above is a wrapper defined in this file. Their
+# source, not this file's, goes into the result cache key.
+ALGORITHM_MODULES = {
+    'External Sort': ['external_sort'],
+    'Parallel Sort': ['parallel_algorithms', 'algorithms'],
+}
+
+# Algorithms that start worker processes of their own. Their cells run alone, so they neither
+# oversubscribe the CPUs nor skew the timings of the cells around them.
+PARALLEL_ALGORITHMS = {'Parallel Sort'}
+
+#=================================================================================================
+#                                      INPUT DISTRIBUTIONS
+#=================================================================================================
+
+def _random(size, rng):
+    return rng.integers(0, 10 * size + 1, size=size).tolist()
+
+def _sorted(size, rng):
+    return sorted(_random(size, rng))
+
+def _reversed(size, rng):
+    return sorted(_random(size, rng), reverse=True)
+
+def _few_unique(size, rng):
+    return rng.integers(0, 10, size=size).tolist()
+
+def _nearly_sorted(size, rng):
+    """ Sorted, then about 1% of the positions swapped with a random other position. """
+    items = _sorted(size, rng)
+    if size > 1:
+        for i, j in rng.integers(0, size, size=(max(size // 100, 1), 2)):
+            items[i], items[j] = items[j], items[i]
+    return items
+
+DISTRIBUTIONS = {
+    'random': _random,
+    'sorted': _sorted,
+    'reversed': _reversed,
+    'few_unique': _few_unique,
+    'nearly_sorted': _nearly_sorted,
+}
+
+# The default sizes run up to a large N; quadratic sorts time out long before the end.
+DEFAULT_SIZES = [100, 1000, 10000, 100000, 1000000]
+
+#=================================================================================================
+#                                         SWEEP EXECUTION
+#=================================================================================================
+
+def run_cell(algorithm, distribution, size, REPS=3, seed=0, ready=None):
+    """ Times one cell: REPS sorts of fresh copies of the same generated input.
+        ready, if given, is called once the input is generated and timing starts.
+        Returns a result record with the median, min and IQR in seconds and whether every
+        output was correctly sorted. """
+    import numpy as np
+    import search_time_complexity as tc
+    rng = np.random.default_rng(seed)
+    items = DISTRIBUTIONS[distribution](size, rng)
+    expected = sorted(items)
+    if ready is not None:
+        ready()
+    func = SORT_ALGORITHMS[algorithm]
+    correct = func(list(items)) == expected
+    result = tc.benchmark(func, lambda: (list(items),), MIN_TIME=0, REPEAT=REPS, WARMUP=0, seed=seed)
+    return {'algorithm': algorithm, 'distribution': distribution, 'size': size, 'status': 'ok',
+            'correct': correct, 'median': result['median'], 'min': result['min'],
+            'iqr': result['iqr']}
+
+def _cell_worker(conn, cell, REPS, seed):
+    try:
+        conn.send(run_cell(*cell, REPS=REPS, seed=seed, ready=lambda: conn.send(None)))
+    except Exception as e:
+        conn.send({'algorithm': cell[0], 'distribution': cell[1], 'size': cell[2],
+                   'status': 'error', 'error': repr(e)})
+    finally:
+        conn.close()
+
+def cell_key(cell, REPS, seed):
+    """ Result cache key of a cell; see result_cache.ResultCache. """
+    import importlib
+    from result_cache import ResultCache, source_fingerprint
+    sources = [importlib.import_module(name) for name in ALGORITHM_MODULES.get(cell[0], [])]
+    fingerprint = source_fingerprint(*(sources or [SORT_ALGORITHMS[cell[0]]]))
+    return ResultCache.key('sort', *cell, REPS, seed, fingerprint)
+
+def run_sweep(algorithms=None, distributions=None, sizes=None, REPS=3, TIMEOUT=60.0,
+              processes=None, seed=0, progress=None, cache=None):
+    """ Runs every (algorithm x distribution x size) cell across up to `processes` worker
+        processes, each cell limited to TIMEOUT seconds once its input is generated.
+
+        The sizes of one algorithm and distribution run one after another, smallest first, so once
+        a cell times out, it is recorded with status 'timeout' and the larger sizes with status
+        'skipped' instead of being run. Cells of PARALLEL_ALGORITHMS run alone. progress, if given,
+        is called with each finished record. cache, a result_cache.ResultCache, supplies cells measured before and
+        receives the new ones. Returns the list of result records. """
+    algorithms = algorithms or list(SORT_ALGORITHMS)
+    distributions = distributions or list(DISTRIBUTIONS)
+    sizes = sorted(sizes or DEFAULT_SIZES)
+    processes = processes or os.cpu_count() or 1
+
+    pending = [(a, d, n) for n in sizes for a in algorithms for d in distributions]
+    timed_out = {}  # (algorithm, distribution) -> smallest size that timed out
+    running = {}    # connection -> (process, cell, deadline)
+    # Generating a large input can itself take a while, so it gets a deadline of its own.
+    setup_timeout = max(TIMEOUT, 60.0)
+    results = []
+
+    def record(result):
+        results.append(result)
+        if progress is not None:
+            progress(result)
+
+    def next_cell():
+        """ Removes and returns the first pending cell that may start now, or returns None. """
+        running_cells = [cell for _, cell, _ in running.values()]
+        if any(cell[0] in PARALLEL_ALGORITHMS for cell in running_cells):
+            return None
+        busy = {cell[:2] for cell in running_cells}
+        for i, cell in enumerate(pending):
+            if cell[:2] in busy:  # A smaller size of the same series is still running
+                continue
+            if cell[0] in PARALLEL_ALGORITHMS and running_cells:
+                return None  # Let the running cells drain, then run this one alone
+            return pending.pop(i)
+        return None
+
+    while pending or running:
+        while len(running) < processes:
+            cell = next_cell()
+            if cell is None:
+                break
+            if cell[2] > timed_out.get(cell[:2], float('inf')):
+                record({'algorithm': cell[0], 'distribution': cell[1], 'size': cell[2],
+                        'status': 'skipped'})
+                continue
+            cached = cache.get(cell_key(cell, REPS, seed)) if cache is not None else None
+            if cached is not None:
+                record(cached)
+                continue
+            parent_conn, child_conn = multiprocessing.Pipe(duplex=False)
+            process = multiprocessing.Process(target=_cell_worker,
+                                              args=(child_conn, cell, REPS, seed))
+            process.start()
+            child_conn.close()
+            running[parent_conn] = (process, cell, time.monotonic() + setup_timeout)
+        if not running:
+            continue
+
+        next_deadline = min(deadline for _, _, deadline in running.values())
+        for conn in wait(list(running), timeout=max(next_deadline - time.monotonic(), 0)):
+            process, cell, deadline = running[conn]
+            try:
+                result = conn.recv()
+                if result is None:  # Input generated; the timeout counts from here
+                    running[conn] = (process, cell, time.monotonic() + TIMEOUT)
+                    continue
+                record(result)
+                if cache is not None and result['status'] == 'ok':
+                    cache.put(cell_key(cell, REPS, seed), result)
+            except EOFError:  # The worker died without reporting, e.g. out of memory
+                record({'algorithm': cell[0], 'distribution': cell[1], 'size': cell[2],
+                        'status': 'error', 'error': f'exit code {process.exitcode}'})
+            del running[conn]
+            conn.close()
+            process.join()
+
+        now = time.monotonic()
+        for conn, (process, cell, deadline) in list(running.items()):
+            if now >= deadline:
+                process.terminate()
+                process.join()
+                conn.close()
+                del running[conn]
+                timed_out[cell[:2]] = min(cell[2], timed_out.get(cell[:2], float('inf')))
+                record({'algorithm': cell[0], 'distribution': cell[1], 'size': cell[2],
+                        'status': 'timeout'})
+
+    results.sort(key=lambda r: (r['algorithm'], r['distribution'], r['size']))
+    return results
+
+#=================================================================================================
+#                                   PERSISTENCE AND COMPARISON
+#=================================================================================================
+
+RESULT_FIELDS = ['algorithm', 'distribution', 'size', 'status', 'correct', 'median', 'min', 'iqr',
+                 'error']
+
+def save_results(results, path):
+    """ Writes result records to a .json or .csv file. """
+    if path.endswith('.csv'):
+        with open(path, 'w', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=RESULT_FIELDS)
+            writer.writeheader()
+            writer.writerows(results)
+    else:
+        with open(path, 'w') as f:
+            json.dump(results, f, indent=2)
+
+def load_results(path):
+    """ Reads result records written by save_results. """
+    if path.endswith('.csv'):
+        with open(path, newline='') as f:
+            results = []
+            for row in csv.DictReader(f):
+                row = {key: value for key, value in row.items() if value != ''}
+                row['size'] = int(row['size'])
+                for key in ('median', 'min', 'iqr'):
+                    if key in row:
+                        row[key] = float(row[key])
+                if 'correct' in row:
+                    row['correct'] = row['correct'] == 'True'
+                results.append(row)
+            return results
+    with open(path) as f:
+        return json.load(f)
+
+def diff_results(old, new, TOLERANCE=0.1):
+    """ Compares two sweeps cell by cell.
+        Returns, for every cell present in both, the old and new median times (None when the cell
+        did not complete), their ratio, and whether the cell regressed, i.e. became slower than
+        the tolerance allows or stopped completing. """
+    old_cells = {(r['algorithm'], r['distribution'], r['size']): r for r in old}
+    diff = []
+    for r in new:
+        key = (r['algorithm'], r['distribution'], r['size'])
+        if key not in old_cells:
+            continue
+        old_median = old_cells[key].get('median') if old_cells[key]['status'] == 'ok' else None
+        new_median = r.get('median') if r['status'] == 'ok' else None
+        ratio = new_median / old_median if old_median and new_median is not None else None
+        regression = (ratio is not None and ratio > 1 + TOLERANCE) or \
+            (old_median is not None and new_median is None)
+        diff.append({'algorithm': key[0], 'distribution': key[1], 'size': key[2],
+                     'old_median': old_median, 'new_median': new_median, 'ratio': ratio,
+                     'regression': regression})
+    return diff
@@ -0,0 +1,252 @@
+import os
+import random
+import numpy as np
+import pytest
+import algorithms as alg
+import external_sort as ext
+import parallel_algorithms as par
+
+#=================================================================================================
+#                                      SEARCHING ALGORITHMS
+#=================================================================================================
+
+@pytest.mark.parametrize('items, target, expected', [
+    ([1, 2, 2, 2, 3], 2, 1),
+    ([2, 2, 2], 2, 0),
+    ([1, 3, 5, 7], 7, 3),
+    ([1, 3, 5, 7], 4, None),
+    ([1, 3, 5, 7], 0, None),
+    ([1, 3, 5, 7], 8, None),
+    ([], 1, None),
+])
+def test_binary_search_returns_first_occurrence_or_none(items, target, expected):
+    assert alg.binary_search(items, target) == expected
+
+def test_binary_search_matches_list_index():
+    rng = random.Random(0)
+    items = sorted(rng.randrange(50) for i in range(200))
+    for target in range(-1, 51):
+        expected = items.index(target) if target in items else None
+        assert alg.binary_search(items, target) == expected
+
+def test_binary_search_many_matches_binary_search():
+    rng = random.Random(1)
+    items = sorted(rng.randrange(50) for i in range(200))
+    targets = list(range(-1, 51))
+    expected = [alg.binary_search(items, t) for t in targets]
+    assert alg.binary_search_many(items, targets).tolist() == [-1 if i is None else i for i in expected]
+
+#=================================================================================================
+#                                           MERGE SORT
+#=================================================================================================
+
+def test_merge_is_stable_and_leaves_inputs_unchanged():
+    A, B = [1, 2, 2], [2, 3]
+    assert alg.merge(A, B) == [1, 2, 2, 2, 3]
+    assert (A, B) == ([1, 2, 2], [2, 3])
+
+@pytest.mark.parametrize('size', [0, 1, alg.MERGE_SORT_CUTOFF, alg.MERGE_SORT_CUTOFF + 1, 1000])
+def test_merge_sort_sorts_into_a_new_list(size):
+    rng = random.Random(size)
+    items = [rng.randrange(100) for i in range(size)]
+    original = list(items)
+    assert alg.merge_sort(items) == sorted(original)
+    assert items == original
+
+def test_merge_sort_with_key_is_stable():
+    rng = random.Random(2)
+    records = [(rng.randrange(10), i) for i in range(500)]
+    result = alg.merge_sort(records, key=lambda record: record[0])
+    # Python's sort is stable, so it gives the expected order of equal keys.
+    assert result == sorted(records, key=lambda record: record[0])
+
+#=================================================================================================
+#                                           QUICK SORT
+#=================================================================================================
+
+QUICK_SORT_INPUTS = {
+    'sorted': lambda n, rng: list(range(n)),
+    'reversed': lambda n, rng: list(range(n, 0, -1)),
+    'all_equal': lambda n, rng: [7] * n,
+    'organ_pipe': lambda n, rng: list(range(n // 2)) + list(range(n // 2, 0, -1)),
+    'few_unique': lambda n, rng: [rng.randrange(3) for i in range(n)],
+    'random': lambda n, rng: [rng.random() for i in range(n)],
+}
+
+@pytest.mark.parametrize('distribution', QUICK_SORT_INPUTS)
+@pytest.mark.parametrize('size', [0, 1, 2, alg.QUICK_SORT_CUTOFF + 1, 41, 5000])
+def test_quick_sort_sorts_in_place(distribution, size):
+    items = QUICK_SORT_INPUTS[distribution](size, random.Random(size))
+    expected = sorted(items)
+    result = alg.quick_sort(items)
+    assert result is items
+    assert items == expected
+
+#=================================================================================================
+#                                          EXTERNAL SORT
+#=================================================================================================
+
+def test_external_sort_merges_more_runs_than_max_open_runs(tmp_path, monkeypatch):
+    monkeypatch.setattr(ext, 'MAX_OPEN_RUNS', 3)
+    rng = random.Random(3)
+    values = [rng.random() for i in range(10 * 1024 + 7)]  # 11 runs of the minimum run size
+    assert list(ext.external_sort(values, memory_limit=1, tmpdir=tmp_path)) == sorted(values)
+    assert os.listdir(tmp_path) == []
+
+def test_external_sort_with_processes():
+    rng = random.Random(4)
+    values = [rng.random() for i in range(5000)]
+    assert list(ext.external_sort(values, memory_limit=1, processes=2)) == sorted(values)
+
+def test_external_sort_of_64_bit_integers():
+    rng = random.Random(5)
+    values = [rng.randrange(-2**63, 2**63) for i in range(3000)]
+    result = list(ext.external_sort(values, memory_limit=1, typecode='q'))
+    assert result == sorted(values)
+    assert all(isinstance(value, int) for value in result)
+
+def test_external_sort_of_empty_input(tmp_path):
+    assert list(ext.external_sort([], tmpdir=tmp_path)) == []
+    assert os.listdir(tmp_path) == []
+
+def test_external_sort_removes_run_files_when_closed_early(tmp_path):
+    sorted_values = ext.external_sort(range(5000, 0, -1), memory_limit=1, typecode='q',
+                                      tmpdir=tmp_path)
+    assert next(sorted_values) == 1
+    sorted_values.close()
+    assert os.listdir(tmp_path) == []
+
+@pytest.mark.parametrize('typecode', ['d', 'q'])
+def test_external_sort_file_round_trip_leaves_no_temporary_files(tmp_path, typecode):
+    rng = random.Random(6)
+    values = [rng.randrange(-1000, 1000) for i in range(4000)]
+    ext.write_binary_keys(tmp_path / 'input.bin', values, typecode)
+
+    ext.external_sort_file(tmp_path / 'input.bin', tmp_path / 'output.bin', typecode,
+                           memory_limit=1)
+
+    assert list(ext.read_binary_keys(tmp_path / 'output.bin', typecode)) == sorted(values)
+    assert sorted(os.listdir(tmp_path)) == ['input.bin', 'output.bin']
+
+#=================================================================================================
+#                                      PARALLEL ALGORITHMS
+#=================================================================================================
+
+PARALLEL_SORT_INPUTS = {
+    'random': lambda rng: rng.random(20000),
+    'many_duplicates': lambda rng: rng.integers(0, 5, 20000),
+    'all_equal': lambda rng: np.full(20000, 7),
+    'sorted': lambda rng: np.arange(20000),
+    'tiny': lambda rng: rng.random(3),
+}
+
+@pytest.mark.parametrize('distribution', PARALLEL_SORT_INPUTS)
+@pytest.mark.parametrize('method', ['sample', 'chunks'])
+def test_parallel_sort_matches_np_sort(method, distribution):
+    values = PARALLEL_SORT_INPUTS[distribution](np.random.default_rng(7))
+    result = par.parallel_sort(values, processes=3, method=method)
+    np.testing.assert_array_equal(result, np.sort(values))
+    assert result.dtype == values.dtype
+
+def test_parallel_sort_rejects_unknown_methods():
+    with pytest.raises(ValueError):
+        par.parallel_sort(np.arange(100), processes=2, method='bogus')
+
+def test_parallel_search_matches_binary_search_many():
+    rng = np.random.default_rng(8)
+    items = np.sort(rng.integers(0, 1000, 5000))
+    targets = rng.integers(-10, 1010, 3000)
+    np.testing.assert_array_equal(par.parallel_search(items, targets, processes=3),
+                                  alg.binary_search_many(items, targets))
+
+#=================================================================================================
+#                                       SORT AND SEARCH DISPATCH
+#=================================================================================================
+
+def _dispatch_inputs():
+    from array import array
+    rng = random.Random(9)
+    ints = [rng.randrange(-50, 50) for i in range(40)]
+    return {
+        'ints': ints,
+        'floats': [rng.uniform(-1, 1) for i in range(40)],
+        'bools': [rng.random() < 0.5 for i in range(40)],
+        'int_float_mix': [x if i % 2 else x + 0.5 for i, x in enumerate(ints)],
+        'big_ints': [rng.randrange(-2**70, 2**70) for i in range(40)],
+        'strings': [str(x) for x in ints],
+        'short_list': ints[:5],
+        'array_q': array('q', ints),
+        'array_d': array('d', ints),
+        'numpy_int': np.array(ints),
+        'numpy_float': np.array(ints, dtype=np.float32),
+    }
+
+DISPATCH_INPUTS = _dispatch_inputs()
+
+def _same_type(result, items):
+    from array import array
+    if isinstance(items, np.ndarray):
+        return isinstance(result, np.ndarray) and result.dtype == items.dtype
+    if isinstance(items, array):
+        return isinstance(result, array) and result.typecode == items.typecode
+    return isinstance(result, list)
+
+@pytest.mark.parametrize('method', ['auto', 'numpy', 'python'])
+@pytest.mark.parametrize('name', DISPATCH_INPUTS)
+def test_sort_dispatch_matches_sorted(name, method):
+    items = DISPATCH_INPUTS[name]
+    original = list(items)
+    result = alg.sort(items, method=method)
+    assert _same_type(result, items)
+    assert list(result) == sorted(original)
+    if isinstance(items, list):
+        # Elements keep their types, e.g. bools stay bools and mixed ints stay ints.
+        assert [type(x) for x in result] == [type(x) for x in sorted(original)]
+    assert list(items) == original
+
+@pytest.mark.parametrize('method', ['auto', 'numpy', 'python'])
+@pytest.mark.parametrize('name', DISPATCH_INPUTS)
+def test_stable_sort_dispatch_keeps_equal_items_in_order(name, method):
+    items = DISPATCH_INPUTS[name]
+    result = alg.sort(items, kind='stable', method=method)
+    assert list(result) == sorted(items)
+    if isinstance(items, list):
+        assert [type(x) for x in result] == [type(x) for x in sorted(items)]
+
+def _targets(items):
+    values = list(items)
+    absent = ['absent'] if isinstance(values[0], str) else [min(values) - 1, max(values) + 1]
+    return values[::3] + absent
+
+def _expected_indices(items, targets):
+    values = list(items)
+    return [values.index(t) if t in values else -1 for t in targets]
+
+@pytest.mark.parametrize('method', ['auto', 'numpy', 'python'])
+@pytest.mark.parametrize('name', DISPATCH_INPUTS)
+def test_search_dispatch_matches_list_index(name, method):
+    items = DISPATCH_INPUTS[name]
+    targets = _targets(items)
+    # Many targets: the numpy path answers them from a stable argsort of the unsorted items.
+    result = alg.search(items, targets, method=method)
+    assert list(result) == _expected_indices(items, targets)
+    # Few targets: linear scans.
+    assert list(alg.search(items, targets[:2], method=method)) == _expected_indices(items, targets[:2])
+    assert isinstance(result, np.ndarray) == isinstance(items, np.ndarray)
+
+@pytest.mark.parametrize('method', ['auto', 'numpy', 'python'])
+@pytest.mark.parametrize('name', DISPATCH_INPUTS)
+def test_sorted_search_dispatch_matches_list_index(name, method):
+    items = alg.sort(DISPATCH_INPUTS[name], kind='stable', method='python')
+    targets = _targets(items)
+    result = alg.search(items, targets, is_sorted=True, method=method)
+    assert list(result) == _expected_indices(items, targets)
+    assert isinstance(result, np.ndarray) == isinstance(items, np.ndarray)
+
+def test_dispatch_rejects_unknown_methods_and_kinds():
+    with pytest.raises(ValueError):
+        alg.sort([3, 1, 2], method='fortran')
+    with pytest.raises(ValueError):
+        alg.sort([3, 1, 2], kind='bogosort')
+    with pytest.raises(ValueError):
+        alg.search([3, 1, 2], [1], method='fortran')